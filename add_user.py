@@ -3,73 +3,93 @@ Add a user to users.json for the Swift Alliance Streamlit app.
 
 Usage:
   python add_user.py --username <username> --password <password>
+  python add_user.py --bulk <users.csv | users.jsonl | -> [--format csv|jsonl] [--force]
 
 Example:
   python add_user.py --username user --password pass
+  python add_user.py --bulk branch_operators.csv
+
+Bulk import:
+ - CSV needs a header row with "username" and "password" columns; JSON Lines needs
+   one {"username": ..., "password": ...} object per line. "-" reads stdin.
+ - The format comes from the file extension (.csv / .jsonl / .ndjson) unless
+   --format is given; stdin defaults to CSV.
+ - Users already present (or repeated in the input) are skipped unless --force is
+   given. users.json is written once at the end; added / skipped / overwritten
+   counts are printed.
 
 Security:
  - Passwords are hashed (SHA256 + salt) before being written to users.json.
+ - users.json is read and written through user_store.py (atomic replace), the same
+   code the Streamlit app uses.
  - Do NOT commit users.json with real production credentials to public repos.
 """
-import os
-import json
 import argparse
-import hashlib
+import csv
+import io
+import json
+import os
 import sys
 
-ROOT_DIR = os.path.dirname(__file__)
-USERS_FILE = os.path.join(ROOT_DIR, "users.json")
-SALT = "swift_alliance_app_salt_2025"
-
-def hash_password(password: str) -> str:
-    return hashlib.sha256((password + SALT).encode()).hexdigest()
-
-def load_users():
-    if os.path.exists(USERS_FILE):
-        try:
-            with open(USERS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {"users": []}
-    return {"users": []}
-
-def save_users(data):
-    with open(USERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-def user_exists(data, username):
-    for u in data.get("users", []):
-        if u.get("username") == username:
-            return True
-    return False
+from user_store import USERS_FILE, get_directory
 
 def add_user(username, password):
-    data = load_users()
-    if user_exists(data, username):
+    if get_directory(USERS_FILE).add(username, password) == "skipped":
         print(f"User '{username}' already exists. Use --force to overwrite.")
         return 1
-    hashed = hash_password(password)
-    data.setdefault("users", []).append({"username": username, "password": hashed})
-    save_users(data)
     print(f"Added user '{username}' to {USERS_FILE}")
     return 0
 
 def overwrite_user(username, password):
-    data = load_users()
-    new_users = [u for u in data.get("users", []) if u.get("username") != username]
-    new_users.append({"username": username, "password": hash_password(password)})
-    data["users"] = new_users
-    save_users(data)
+    get_directory(USERS_FILE).add(username, password, overwrite=True)
     print(f"Overwritten user '{username}' in {USERS_FILE}")
     return 0
 
+def iter_bulk_users(source, fmt=None):
+    """Yield (username, password) pairs from a CSV or JSON Lines file, or stdin for "-"."""
+    if fmt is None:
+        ext = os.path.splitext(source)[1].lower()
+        fmt = "jsonl" if ext in (".jsonl", ".ndjson") else "csv"
+    if source == "-":
+        f = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    else:
+        f = open(source, "r", encoding="utf-8", newline="")
+    with f:
+        if fmt == "jsonl":
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for n, row in enumerate(rows, 1):
+            if not isinstance(row, dict):
+                raise ValueError(f"{source}: record {n} is not an object")
+            username = str(row.get("username") or "").strip()
+            password = str(row.get("password") or "")
+            if not username or not password:
+                raise ValueError(f"{source}: record {n} needs a username and a password")
+            yield username, password
+
+def bulk_add_users(source, fmt=None, force=False):
+    try:
+        counts = get_directory(USERS_FILE).add_many(iter_bulk_users(source, fmt), overwrite=force)
+    except (OSError, ValueError) as e:
+        print(f"Bulk import failed, {USERS_FILE} unchanged: {e}")
+        return 1
+    print(f"added={counts['added']} skipped={counts['skipped']} overwritten={counts['overwritten']} ({USERS_FILE})")
+    return 0
+
 def main():
     parser = argparse.ArgumentParser(description="Add or overwrite a user for the Swift Alliance app")
-    parser.add_argument("--username", required=True)
-    parser.add_argument("--password", required=True)
+    parser.add_argument("--username")
+    parser.add_argument("--password")
+    parser.add_argument("--bulk", metavar="FILE", help="Import users from a CSV / JSON Lines file ('-' for stdin)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Bulk input format (default: from the file extension)")
     parser.add_argument("--force", action="store_true", help="Overwrite existing user if present")
     args = parser.parse_args()
 
+    if args.bulk:
+        sys.exit(bulk_add_users(args.bulk, args.format, args.force))
+    if not args.username or not args.password:
+        parser.error("--username and --password are required (or use --bulk)")
     if args.force:
         sys.exit(overwrite_user(args.username, args.password))
     else:
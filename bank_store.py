@@ -0,0 +1,500 @@
+"""
+bank_store.py
+
+SQLite-backed storage for the Streamlit demo bank (customers, accounts, transactions).
+
+Replaces whole-file rewrites of bank_data.json: every record is a row, so a change
+only touches the rows (and index pages) it affects. The database runs in WAL mode
+so Streamlit sessions can read while another one writes.
+
+Tables (each row keeps the full record as JSON in `data`, plus indexed key columns):
+  - customers(customer_id PK)
+  - accounts(account_number PK, customer_id)          index on customer_id
+  - transactions(txn_id PK, account_number)           index on account_number
+
+Functions:
+  - get_store(db_path=None, json_path=None) -> BankStore   (one shared instance per path)
+  - BankStore.load() -> {"customers": [...], "accounts": [...], "transactions": {...}}
+  - BankStore.save(data) -> None                           (sync a whole dict, same shape)
+  - BankStore.upsert_customer / upsert_account / put_transaction for single-record writes
+  - BankStore.append_transaction / append_balance / compact for the journal (below)
+
+On first use, an existing bank_data.json is imported once and renamed to
+bank_data.json.migrated.
+
+Journal:
+  New transactions and balance changes can be recorded with append_transaction /
+  append_balance. Each is one fsync'd JSON line appended to <db>.journal.jsonl, so
+  a write costs O(1) regardless of data size. load() returns the SQLite snapshot
+  with the journal tail replayed on top. compact() (on demand, or in a background
+  thread every `compact_every` appends) applies the tail to SQLite, records how far
+  it got, and starts a fresh journal generation.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl  # cross-process journal locking (POSIX)
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger("bank_store")
+
+ROOT_DIR = os.path.dirname(__file__)
+DB_FILE = os.path.join(ROOT_DIR, "bank_data.db")
+LEGACY_JSON_FILE = os.path.join(ROOT_DIR, "bank_data.json")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS customers (
+    customer_id TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS accounts (
+    account_number TEXT PRIMARY KEY,
+    customer_id TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_accounts_customer ON accounts(customer_id);
+CREATE TABLE IF NOT EXISTS transactions (
+    txn_id TEXT PRIMARY KEY,
+    account_number TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_account ON transactions(account_number);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _empty() -> Dict[str, Any]:
+    return {"customers": [], "accounts": [], "transactions": {}}
+
+
+def _copy_containers(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {"customers": list(data["customers"]), "accounts": list(data["accounts"]),
+            "transactions": dict(data["transactions"])}
+
+
+def _dumps(record: Any) -> str:
+    return json.dumps(record, sort_keys=True, separators=(",", ":"))
+
+
+def _require(record: Dict[str, Any], key: str, kind: str) -> str:
+    value = record.get(key)
+    if not value:
+        raise ValueError(f"{kind} record without '{key}': {record!r}")
+    return str(value)
+
+
+# --- Append-only journal ---------------------------------------------------------
+
+class TransactionJournal:
+    """
+    Append-only JSON Lines file. The first line is a header naming the journal
+    generation; every other line is one operation. Appends are flushed and fsync'd
+    before returning. Readers take a shared file lock, appenders and compaction an
+    exclusive one (POSIX flock). rotate() atomically replaces the file with an
+    empty new generation; appenders blocked on the old file notice the replaced
+    inode and retry on the new one. A line left half-written by a crash is
+    skipped by readers and cut off by the next append.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        if not os.path.exists(path):
+            self._write_new_generation()
+
+    def _write_new_generation(self) -> Tuple[str, int]:
+        generation = uuid.uuid4().hex
+        header = (json.dumps({"journal": "bank_store", "generation": generation}) + "\n").encode("utf-8")
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        return generation, len(header)
+
+    def _open_locked(self, exclusive: bool):
+        """Open and lock the live journal file (retrying if it was rotated meanwhile)."""
+        while True:
+            f = open(self.path, "a+b")
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                if os.fstat(f.fileno()).st_ino == os.stat(self.path).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            f.close()
+
+    @contextmanager
+    def locked(self, exclusive: bool = False):
+        """Hold the journal lock; yields the open file for read_tail/rotate."""
+        f = self._open_locked(exclusive)
+        try:
+            yield f
+        finally:
+            f.close()
+
+    @staticmethod
+    def _truncate_torn_tail(f) -> int:
+        """
+        Cut a partially written last line (an append interrupted by a crash) back to
+        the last newline, so the next append starts on a line of its own. Needs the
+        exclusive lock. Returns the resulting file size.
+        """
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return 0
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return end  # the usual case: one byte read
+        pos = end
+        while pos > 0:
+            step = min(pos, 64 * 1024)
+            f.seek(pos - step)
+            block = f.read(step)
+            newline = block.rfind(b"\n")
+            if newline != -1:
+                keep = pos - step + newline + 1
+                if keep != end:
+                    logger.warning("Dropping %d bytes of a torn journal line in %s", end - keep, f.name)
+                    f.truncate(keep)
+                return keep
+            pos -= step
+        return end  # no complete line at all; nothing sensible to keep or cut
+
+    def append(self, entry: Dict[str, Any]) -> Tuple[int, int]:
+        """Durably append one operation; returns its (start, end) byte offsets."""
+        line = (json.dumps(entry, separators=(",", ":")) + "\n").encode("utf-8")
+        with self.locked(exclusive=True) as f:
+            start = self._truncate_torn_tail(f)
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            return start, start + len(line)
+
+    def read_tail(self, f, generation: Optional[str], offset: int) -> Tuple[List[Dict[str, Any]], str, int]:
+        """
+        Return (entries, generation, end_offset) for operations after offset, read
+        from a file obtained with locked(). If the file belongs to another generation
+        than given, everything after its header is returned. A partially written
+        last line is ignored.
+        """
+        f.seek(0)
+        header = f.readline()
+        current = json.loads(header.decode("utf-8"))["generation"]
+        pos = offset if current == generation and offset >= len(header) else len(header)
+        f.seek(pos)
+        entries = []
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            entries.append(json.loads(raw.decode("utf-8")))
+            pos += len(raw)
+        return entries, current, pos
+
+    def size(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except OSError:
+            return 0
+
+    def rotate(self, f) -> Tuple[str, int]:
+        """Start a new, empty generation. f must be held with locked(exclusive=True)."""
+        return self._write_new_generation()
+
+
+def _apply_entry(data: Dict[str, Any], entry: Dict[str, Any]) -> None:
+    """
+    Apply one journal operation to a dict in bank_data.json shape.
+
+    Records are replaced, never changed in place: the cached load() data shares
+    them with the copies already handed out.
+    """
+    op = entry.get("op")
+    if op == "txn":
+        data.setdefault("transactions", {})[entry["id"]] = entry["data"]
+    elif op == "balance":
+        accounts = data.get("accounts", [])
+        for i, acct in enumerate(accounts):
+            if acct.get("account_number") == entry["account"]:
+                accounts[i] = dict(acct, balance=entry["balance"])
+                break
+
+
+class BankStore:
+    """
+    One SQLite database (the snapshot) plus a TransactionJournal (the tail).
+
+    Thread-safe: a single connection guarded by a lock; the journal file lock is
+    always taken before that lock. load() results are cached until the database
+    or journal changes, including changes made by other processes
+    (PRAGMA data_version / journal size). Every SQLite write first folds the
+    pending journal tail in, so journal entries and direct writes stay ordered.
+    """
+
+    def __init__(self, db_path: str = DB_FILE, json_path: Optional[str] = LEGACY_JSON_FILE,
+                 journal_path: Optional[str] = None, compact_every: int = 1000):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self.journal = TransactionJournal(journal_path or os.path.splitext(db_path)[0] + ".journal.jsonl")
+        self.compact_every = compact_every
+        self._appends = 0
+        self._compactor: Optional[threading.Thread] = None
+        self._cache: Optional[Dict[str, Any]] = None
+        self._cache_key: Optional[Tuple[int, int]] = None
+        if json_path:
+            self.migrate_from_json(json_path)
+
+    # --- reads -----------------------------------------------------------------
+    def _data_version(self) -> int:
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def _journal_position(self) -> Tuple[Optional[str], int]:
+        """(generation, offset) of the journal prefix already folded into SQLite."""
+        rows = dict(self._conn.execute(
+            "SELECT key, value FROM meta WHERE key IN ('journal_generation', 'journal_offset')"))
+        return rows.get("journal_generation"), int(rows.get("journal_offset") or 0)
+
+    def load(self) -> Dict[str, Any]:
+        """
+        Return all data in the bank_data.json shape: the SQLite snapshot with the
+        journal tail replayed on top. Parsed data is cached until the next change;
+        each call gets its own dict and lists, so callers (e.g. concurrent Streamlit
+        sessions) can add or remove records without affecting each other. The record
+        dicts themselves are shared: treat them as read-only and persist changes with
+        save(), the upsert methods or the journal.
+        """
+        with self.journal.locked() as jf, self._lock:
+            key = (self._data_version(), self.journal.size())
+            if self._cache is not None and self._cache_key == key:
+                return _copy_containers(self._cache)
+            data = _empty()
+            self._conn.execute("BEGIN")
+            try:
+                for (row,) in self._conn.execute("SELECT data FROM customers ORDER BY rowid"):
+                    data["customers"].append(json.loads(row))
+                for (row,) in self._conn.execute("SELECT data FROM accounts ORDER BY rowid"):
+                    data["accounts"].append(json.loads(row))
+                for txn_id, row in self._conn.execute("SELECT txn_id, data FROM transactions ORDER BY rowid"):
+                    data["transactions"][txn_id] = json.loads(row)
+                generation, offset = self._journal_position()
+            finally:
+                self._conn.execute("COMMIT")
+            entries, _, _ = self.journal.read_tail(jf, generation, offset)
+            for entry in entries:
+                _apply_entry(data, entry)
+            self._cache, self._cache_key = data, key
+            return _copy_containers(data)
+
+    def accounts_for_customer(self, customer_id: str) -> List[Dict[str, Any]]:
+        """Accounts of one customer (indexed lookup; reflects compacted journal entries)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM accounts WHERE customer_id = ? ORDER BY rowid", (customer_id,))
+            return [json.loads(r) for (r,) in rows]
+
+    def transactions_for_account(self, account_number: str) -> Dict[str, Any]:
+        """Transactions of one account (indexed lookup; reflects compacted journal entries)."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT txn_id, data FROM transactions WHERE account_number = ? ORDER BY rowid",
+                (account_number,))
+            return {txn_id: json.loads(r) for txn_id, r in rows}
+
+    # --- journal ---------------------------------------------------------------
+    def append_transaction(self, txn_id: str, transaction: Any) -> None:
+        """Record a new (or updated) transaction with one fsync'd journal append."""
+        self._append({"op": "txn", "id": str(txn_id), "data": transaction})
+
+    def append_balance(self, account_number: str, balance: Any) -> None:
+        """Record an account's new balance with one fsync'd journal append."""
+        self._append({"op": "balance", "account": account_number, "balance": str(balance)})
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        start, end = self.journal.append(entry)
+        with self._lock:
+            # keep the cached view current without reloading, unless someone else
+            # appended in between
+            if self._cache is not None and self._cache_key and self._cache_key[1] == start:
+                _apply_entry(self._cache, entry)
+                self._cache_key = (self._cache_key[0], end)
+            else:
+                self._cache = None
+            self._appends += 1
+            if self.compact_every and self._appends >= self.compact_every:
+                self._appends = 0
+                self.compact_in_background()
+
+    def compact(self) -> int:
+        """
+        Fold the journal tail into SQLite and start a new journal generation.
+        Returns the number of operations compacted. Appends wait meanwhile.
+        """
+        with self.journal.locked(exclusive=True) as jf:
+            folded = self._write(lambda: [], jf)
+            self.journal.rotate(jf)
+        return folded
+
+    def compact_in_background(self) -> None:
+        """Run compact() in a daemon thread unless one is already running."""
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=self.compact, name="bank-store-compact", daemon=True)
+            self._compactor.start()
+
+    # --- writes ----------------------------------------------------------------
+    def _fold_entry(self, entry: Dict[str, Any]) -> None:
+        op = entry.get("op")
+        if op == "txn":
+            self._conn.execute(self._UPSERT_TXN, self._txn_row(entry["id"], entry["data"]))
+        elif op == "balance":
+            row = self._conn.execute("SELECT data FROM accounts WHERE account_number = ?",
+                                     (entry["account"],)).fetchone()
+            if row:
+                account = json.loads(row[0])
+                account["balance"] = entry["balance"]
+                self._conn.execute(self._UPSERT_ACCOUNT, self._account_row(account))
+
+    def _write(self, build, jf=None) -> int:
+        """
+        Run the (sql, params_seq) pairs returned by build() in one transaction, after
+        folding in the pending journal tail. Drops the read cache. Returns the number
+        of journal operations folded.
+        """
+        with (nullcontext(jf) if jf is not None else self.journal.locked()) as held:
+            jf = held
+            with self._lock:
+                self._conn.execute("BEGIN IMMEDIATE")
+                try:
+                    generation, offset = self._journal_position()
+                    entries, generation, offset = self.journal.read_tail(jf, generation, offset)
+                    for entry in entries:
+                        self._fold_entry(entry)
+                    self._conn.executemany("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+                                           [("journal_generation", generation), ("journal_offset", str(offset))])
+                    for sql, params in build():
+                        self._conn.executemany(sql, params)
+                    self._conn.execute("COMMIT")
+                except BaseException:
+                    self._conn.execute("ROLLBACK")
+                    raise
+                finally:
+                    self._cache = None
+                return len(entries)
+
+    _UPSERT_CUSTOMER = ("INSERT INTO customers(customer_id, data) VALUES (?, ?) "
+                        "ON CONFLICT(customer_id) DO UPDATE SET data = excluded.data "
+                        "WHERE customers.data != excluded.data")
+    _UPSERT_ACCOUNT = ("INSERT INTO accounts(account_number, customer_id, data) VALUES (?, ?, ?) "
+                       "ON CONFLICT(account_number) DO UPDATE SET customer_id = excluded.customer_id, "
+                       "data = excluded.data WHERE accounts.data != excluded.data")
+    _UPSERT_TXN = ("INSERT INTO transactions(txn_id, account_number, data) VALUES (?, ?, ?) "
+                   "ON CONFLICT(txn_id) DO UPDATE SET account_number = excluded.account_number, "
+                   "data = excluded.data WHERE transactions.data != excluded.data")
+
+    @staticmethod
+    def _customer_row(c: Dict[str, Any]):
+        return (_require(c, "customer_id", "customer"), _dumps(c))
+
+    @staticmethod
+    def _account_row(a: Dict[str, Any]):
+        return (_require(a, "account_number", "account"), a.get("customer_id"), _dumps(a))
+
+    @staticmethod
+    def _txn_row(txn_id: str, t: Any):
+        account = t.get("account_number") if isinstance(t, dict) else None
+        return (str(txn_id), account, _dumps(t))
+
+    def upsert_customer(self, customer: Dict[str, Any]) -> None:
+        row = self._customer_row(customer)
+        self._write(lambda: [(self._UPSERT_CUSTOMER, [row])])
+
+    def upsert_account(self, account: Dict[str, Any]) -> None:
+        row = self._account_row(account)
+        self._write(lambda: [(self._UPSERT_ACCOUNT, [row])])
+
+    def put_transaction(self, txn_id: str, transaction: Any) -> None:
+        row = self._txn_row(txn_id, transaction)
+        self._write(lambda: [(self._UPSERT_TXN, [row])])
+
+    def save(self, data: Dict[str, Any]) -> None:
+        """
+        Make the database match data (bank_data.json shape) in one transaction.
+        Unchanged rows are not rewritten; rows missing from data are deleted.
+        """
+        customers = [self._customer_row(c) for c in data.get("customers", [])]
+        accounts = [self._account_row(a) for a in data.get("accounts", [])]
+        txns = [self._txn_row(k, v) for k, v in (data.get("transactions") or {}).items()]
+
+        def build():
+            statements = [
+                (self._UPSERT_CUSTOMER, customers),
+                (self._UPSERT_ACCOUNT, accounts),
+                (self._UPSERT_TXN, txns),
+            ]
+            # only the key sets are compared here; record bodies are compared by SQLite
+            for table, key, rows in (("customers", "customer_id", customers),
+                                     ("accounts", "account_number", accounts),
+                                     ("transactions", "txn_id", txns)):
+                wanted = {r[0] for r in rows}
+                stale = [(k,) for (k,) in self._conn.execute(f"SELECT {key} FROM {table}") if k not in wanted]
+                if stale:
+                    statements.append((f"DELETE FROM {table} WHERE {key} = ?", stale))
+            return statements
+
+        self._write(build)
+
+    # --- migration -------------------------------------------------------------
+    def migrate_from_json(self, json_path: str) -> bool:
+        """
+        Import a legacy bank_data.json once and rename it to <json_path>.migrated.
+        Returns True if data was imported.
+        """
+        if not os.path.exists(json_path):
+            return False
+        done = self._conn.execute("SELECT value FROM meta WHERE key = 'migrated_from_json'").fetchone()
+        if done:
+            return False
+        with open(json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.save(data)
+        with self._lock:
+            self._conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES ('migrated_from_json', ?)",
+                               (os.path.abspath(json_path),))
+        os.replace(json_path, json_path + ".migrated")
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_STORES: Dict[str, BankStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_store(db_path: Optional[str] = None, json_path: Optional[str] = LEGACY_JSON_FILE) -> BankStore:
+    """Return the process-wide BankStore for db_path (created and migrated on first use)."""
+    db_path = os.path.abspath(db_path or DB_FILE)
+    with _STORES_LOCK:
+        store = _STORES.get(db_path)
+        if store is None:
+            store = _STORES[db_path] = BankStore(db_path, json_path)
+        return store
@@ -0,0 +1,359 @@
+"""
+benchmarks.py
+
+Micro-benchmarks for the local message tooling. Nothing here contacts external services.
+
+Usage:
+  python benchmarks.py pretty [--number 2000]
+  python benchmarks.py importtime [--module NAME ...] [--top 15] [--budget-ms 300]
+  python benchmarks.py gateway [--number 200] [--threads 8]
+  python benchmarks.py status [--number 1000] [--batch-size 50]
+  python benchmarks.py download [--size-mb 16]
+
+Benchmarks:
+  - pretty: per-message latency of pain.001 serialization, comparing the old
+    ElementTree -> minidom round-trip with the single-pass serializer
+    (swift_messages.serialize_xml) in pretty and compact mode.
+  - importtime: cold import cost of the apps' own startup imports (the module-level
+    imports of swift_alliance_streamlit.py and swift_alliance_gui.py, minus their
+    framework), measured in a fresh interpreter with `python -X importtime` and
+    parsed from its stderr. Prints each module's cumulative time and the slowest
+    transitive imports. Exits 1 if those imports load an optional library
+    (xmlschema, reportlab, paramiko, cairosvg, ...) eagerly, or, with --budget-ms,
+    when the total is over budget, so startup regressions fail CI.
+  - gateway: submissions + status polls against the local stub gateway
+    (gateway_stub.py), once with a fresh requests.post/get per call (the old
+    streamlit_client behaviour) and once through the pooled GatewayClient;
+    reports TCP connections opened and latency, and checks that an injected
+    503 on a GET is retried transparently.
+  - status: load test of status_tracker.StatusTracker against the stub gateway:
+    tracks N messages until all reach a terminal state and reports HTTP requests
+    and status polls, next to the N x polls a per-message loop would need.
+  - download: peak Python heap (tracemalloc) for fetching one large document from
+    the stub gateway, as raw PDF bytes and as legacy {"pdf_b64": ...} JSON: the old
+    api_get() + in-memory decode path vs GatewayClient.download() into a temp file.
+"""
+import argparse
+import ast
+import os
+import subprocess
+import sys
+import threading
+import timeit
+import xml.dom.minidom
+from decimal import Decimal
+
+import swift_messages
+
+
+def _sample_payment():
+    return swift_messages.payment_from_transaction(
+        account_number="CH9300762011623852957",
+        account_name="ANDRO AG",
+        beneficiary_account="DE89370400440532013000",
+        beneficiary_name="Beneficiary GmbH",
+        amount=Decimal("1234.56"),
+        currency="CHF",
+        remittance_info="Invoice 2025-001",
+        beneficiary_bic="COBADEFFXXX",
+        reference="BENCH0000001",
+    )
+
+
+def _report(name: str, seconds: float, number: int, baseline: float = None):
+    per_msg_us = seconds / number * 1e6
+    line = f"  {name:<28} {per_msg_us:9.1f} us/msg"
+    if baseline:
+        line += f"   ({baseline / seconds:4.1f}x vs minidom)"
+    print(line)
+
+
+def bench_pretty(number: int):
+    payment = _sample_payment()
+
+    def minidom_roundtrip():
+        # what generate_pain001 used to do: build + serialize, re-parse into a DOM, pretty print
+        xml_bytes = swift_messages.generate_pain001(payment, compact=True).encode("utf-8")
+        return xml.dom.minidom.parseString(xml_bytes).toprettyxml(indent="  ", encoding="utf-8").decode("utf-8")
+
+    def build_only():
+        return swift_messages.generate_pain001(payment, compact=True)
+
+    print(f"pain.001 serialization ({number} messages)")
+    t_build = timeit.timeit(build_only, number=number)
+    t_minidom = timeit.timeit(minidom_roundtrip, number=number)
+    t_pretty = timeit.timeit(lambda: swift_messages.generate_pain001(payment), number=number)
+    _report("build + minidom pretty", t_minidom, number)
+    _report("build + single-pass pretty", t_pretty, number, t_minidom)
+    _report("build + compact", t_build, number, t_minidom)
+
+
+# The apps whose startup imports are measured and checked. Their framework
+# (streamlit, PyQt5) is excluded from timing: its cost is fixed and would drown
+# out our own, and its own imports are not held against the lazy-import check.
+APP_SCRIPTS = ["swift_alliance_streamlit.py", "swift_alliance_gui.py"]
+FRAMEWORK_MODULES = ("streamlit", "PyQt5")
+# Optional libraries the apps must only import on first use (see optional_deps.py)
+LAZY_MODULES = ("xmlschema", "lxml", "reportlab", "paramiko", "cairosvg", "PIL", "requests")
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def app_startup_imports(scripts=APP_SCRIPTS, framework: bool = False):
+    """
+    The import statements an app script runs at startup: module-level imports,
+    including those inside top-level try blocks. framework=True returns only the
+    FRAMEWORK_MODULES imports, False everything else.
+    """
+    statements = []
+    for script in scripts:
+        with open(os.path.join(_HERE, script), "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), script)
+        for node in tree.body:
+            for stmt in (node.body if isinstance(node, ast.Try) else [node]):
+                if isinstance(stmt, ast.Import):
+                    roots = [a.name.split(".")[0] for a in stmt.names]
+                elif isinstance(stmt, ast.ImportFrom) and not stmt.level:
+                    roots = [stmt.module.split(".")[0]]
+                else:
+                    continue
+                if any(r in FRAMEWORK_MODULES for r in roots) == framework:
+                    statements.append(ast.unparse(stmt))
+    return list(dict.fromkeys(statements))
+
+
+def _import_code(statements) -> str:
+    # a module the tree cannot import here (e.g. the GUI's PyQt5) must not hide the others
+    return "\n".join(f"try:\n    {stmt}\nexcept ImportError:\n    pass" for stmt in statements)
+
+
+def _statement_roots(statements):
+    roots = []
+    for stmt in statements:
+        node = ast.parse(stmt).body[0]
+        names = [a.name for a in node.names] if isinstance(node, ast.Import) else [node.module]
+        roots.extend(n.split(".")[0] for n in names)
+    return list(dict.fromkeys(roots))
+
+
+def measure_import_times(statements):
+    """
+    Run import statements in a fresh interpreter under -X importtime. Returns
+    {module name: (self_us, cumulative_us)} for every module imported.
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", _import_code(statements)],
+                          cwd=_HERE, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    times = {}
+    for line in proc.stderr.splitlines():
+        # "import time:      self [us] | cumulative | imported package"; nesting is
+        # shown by extra indentation of the name
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if name.strip() == "site" and not name[1:].startswith(" "):
+            times.clear()  # everything so far was interpreter start-up, not our imports
+            continue
+        times[name.strip()] = (int(self_us), int(cumulative_us))
+    return times
+
+
+def _loaded_modules(statements):
+    """Top-level names in sys.modules after running statements in a fresh interpreter."""
+    code = _import_code(statements) + "\nimport sys\nprint(' '.join(sorted({m.split('.')[0] for m in sys.modules})))"
+    proc = subprocess.run([sys.executable, "-c", code], cwd=_HERE, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "import failed")
+    return set(proc.stdout.split())
+
+
+def eager_optional_imports(scripts=APP_SCRIPTS):
+    """LAZY_MODULES loaded by the apps' startup imports (beyond what their framework loads)."""
+    framework = _loaded_modules(app_startup_imports(scripts, framework=True))
+    app = _loaded_modules(app_startup_imports(scripts, framework=True) + app_startup_imports(scripts))
+    return sorted(m for m in LAZY_MODULES if m in app and m not in framework)
+
+
+def bench_importtime(statements, top: int, budget_ms: float = None) -> int:
+    times = measure_import_times(statements)
+    roots = _statement_roots(statements)
+    total_ms = sum(times[m][1] for m in roots if m in times) / 1000
+    print(f"cold import of {len(statements)} startup import statement(s)")
+    for m in sorted(roots, key=lambda m: -times.get(m, (0, 0))[1]):
+        if times.get(m, (0, 0))[1]:
+            print(f"  {m:<28} {times[m][1] / 1000:9.1f} ms")
+    print(f"  {'total':<28} {total_ms:9.1f} ms")
+    print(f"slowest imports (cumulative, top {top})")
+    for name, (self_us, cum_us) in sorted(times.items(), key=lambda kv: -kv[1][1])[:top]:
+        print(f"  {name:<40} {cum_us / 1000:9.1f} ms  (self {self_us / 1000:.1f} ms)")
+    status = 0
+    eager = eager_optional_imports()
+    if eager:
+        print(f"FAIL: app startup imports optional libraries eagerly: {', '.join(eager)}")
+        status = 1
+    if budget_ms is not None and total_ms > budget_ms:
+        print(f"FAIL: {total_ms:.1f} ms exceeds budget of {budget_ms:.1f} ms")
+        status = 1
+    return status
+
+
+def bench_gateway(number: int, threads: int) -> int:
+    from concurrent.futures import ThreadPoolExecutor
+
+    import requests
+    from gateway_client import GatewayClient
+    from gateway_stub import StubGateway
+
+    payload = {"type": "MT103", "reference": "BENCH0000001", "amount": "1234.56", "currency": "CHF"}
+
+    with StubGateway() as stub:
+        def unpooled(_):
+            mid = requests.post(stub.url + "/messages/create", json=payload, timeout=10).json()["message_id"]
+            requests.get(f"{stub.url}/messages/{mid}/status", timeout=10).json()
+
+        client = GatewayClient(stub.url)
+
+        def pooled(_):
+            mid = client.post_json("/messages/create", data=payload)["message_id"]
+            client.get(f"/messages/{mid}/status")
+
+        print(f"gateway round-trips ({number} x create + status, {threads} threads)")
+        for name, fn in (("requests.post/get per call", unpooled), ("pooled GatewayClient", pooled)):
+            stub.reset_counters()
+            start = timeit.default_timer()
+            with ThreadPoolExecutor(threads) as pool:
+                list(pool.map(fn, range(number)))
+            elapsed = timeit.default_timer() - start
+            print(f"  {name:<28} {stub.connections:5d} connections  {stub.requests:5d} requests"
+                  f"  {elapsed / number * 1e3:7.2f} ms/iteration")
+
+        stub.fail_next(2, status=503)
+        ok = client.get("/ping") == {"ok": True}
+        print(f"  retry on 503 (GET):          {'ok' if ok else 'FAILED'}")
+        client.close()
+    return 0 if ok else 1
+
+
+def bench_status(number: int, batch_size: int) -> int:
+    from gateway_client import GatewayClient
+    from gateway_stub import StubGateway
+    from status_tracker import StatusTracker, gateway_status_fetcher
+
+    with StubGateway(nack_every=10) as stub:
+        client = GatewayClient(stub.url)
+        ids = [client.post_json("/messages/create", data={"reference": f"S{i}"})["message_id"]
+               for i in range(number)]
+        stub.reset_counters()
+        finished = {}
+        done = threading.Event()
+
+        def on_update(mid, state, status):
+            if state in ("SENT", "ACKED", "NACKED"):
+                finished[mid] = state
+                if len(finished) == number:
+                    done.set()
+
+        tracker = StatusTracker(gateway_status_fetcher(client), batch_size=batch_size,
+                                initial_delay=0.05, max_delay=0.5, on_update=on_update,
+                                use_queue=False).start()
+        start = timeit.default_timer()
+        for mid in ids:
+            tracker.track(mid)
+        ok = done.wait(60)
+        elapsed = timeit.default_timer() - start
+        tracker.stop()
+        client.close()
+        states = {s: list(finished.values()).count(s) for s in sorted(set(finished.values()))}
+        print(f"status tracking ({number} messages, batch size {batch_size})")
+        print(f"  terminal: {len(finished)}/{number} {states} in {elapsed:.2f} s")
+        print(f"  {stub.requests} HTTP requests ({tracker.polls} batched polls); "
+              f"a per-message loop needs >= {number * 3}")
+    return 0 if ok else 1
+
+
+def bench_download(size_mb: int) -> int:
+    import base64
+    import hashlib
+    import tracemalloc
+    from gateway_client import GatewayClient
+    from gateway_stub import StubGateway
+
+    def peak(fn):
+        tracemalloc.start()
+        try:
+            digest = fn()
+            return tracemalloc.get_traced_memory()[1], digest
+        finally:
+            tracemalloc.stop()
+
+    with StubGateway() as stub:
+        client = GatewayClient(stub.url)
+        body = os.urandom(size_mb * 1024 * 1024 // 2).hex()
+        mid = client.post_json("/messages/create", data={"body": body})["message_id"]
+        del body
+        path = f"/messages/{mid}/download"
+        print(f"download of a {size_mb} MB document")
+        ok = True
+        for label, params in (("pdf bytes", {"format": "pdf"}),
+                              ("pdf_b64 JSON", {"format": "pdf", "encoding": "base64"})):
+            def in_memory():
+                res = client.get(path, params=params)
+                raw = res if isinstance(res, bytes) else base64.b64decode(res["pdf_b64"])
+                return hashlib.sha256(raw).hexdigest()
+
+            def streamed():
+                f, _ = client.download(path, params=params)
+                with f:
+                    h = hashlib.sha256()
+                    for chunk in iter(lambda: f.read(1 << 16), b""):
+                        h.update(chunk)
+                    return h.hexdigest()
+
+            client.download(path, params=params)[0].close()  # let the stub build the document
+            old_peak, old_digest = peak(in_memory)
+            new_peak, new_digest = peak(streamed)
+            ok = ok and old_digest == new_digest
+            print(f"  {label:>13}: in memory {old_peak / 2**20:7.1f} MB peak, "
+                  f"streamed {new_peak / 2**20:7.1f} MB peak, "
+                  f"{'identical' if old_digest == new_digest else 'MISMATCH'}")
+        client.close()
+    return 0 if ok else 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Swift Alliance micro-benchmarks")
+    sub = parser.add_subparsers(dest="bench", required=True)
+    p = sub.add_parser("pretty", help="pain.001 pretty-print latency (minidom vs single-pass)")
+    p.add_argument("--number", type=int, default=2000)
+    p = sub.add_parser("importtime", help="cold import time of the app modules (-X importtime)")
+    p.add_argument("--module", action="append", dest="modules",
+                   help="module to import (repeatable; default: the apps' startup imports)")
+    p.add_argument("--top", type=int, default=15, help="how many of the slowest imports to list")
+    p.add_argument("--budget-ms", type=float, default=None, help="exit 1 if the total exceeds this")
+    p = sub.add_parser("gateway", help="connections opened: per-call requests vs pooled GatewayClient")
+    p.add_argument("--number", type=int, default=200)
+    p.add_argument("--threads", type=int, default=8)
+    p = sub.add_parser("status", help="batched status polling load test against the stub gateway")
+    p.add_argument("--number", type=int, default=1000)
+    p.add_argument("--batch-size", type=int, default=50)
+    p = sub.add_parser("download", help="peak heap: in-memory vs streamed document download")
+    p.add_argument("--size-mb", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.bench == "pretty":
+        bench_pretty(args.number)
+    elif args.bench == "importtime":
+        statements = [f"import {m}" for m in args.modules] if args.modules else app_startup_imports()
+        return bench_importtime(statements, args.top, args.budget_ms)
+    elif args.bench == "gateway":
+        return bench_gateway(args.number, args.threads)
+    elif args.bench == "status":
+        return bench_status(args.number, args.batch_size)
+    elif args.bench == "download":
+        return bench_download(args.size_mb)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
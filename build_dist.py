@@ -10,6 +10,7 @@ APP_NAME = "swift_alliance_gui"
 ENTRY_SCRIPT = "swift_alliance_gui.py"
 ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
 LOGO_FILENAMES = ["swift_logo.png", "swift_logo.svg", "swift_logo.jpg"]
+SCHEMAS_DIR = os.path.join(ASSETS_DIR, "schemas")
 
 def find_logo():
     for fname in LOGO_FILENAMES:
@@ -18,6 +19,23 @@ def find_logo():
             return path
     return None
 
+def precompile_schemas():
+    """Write <xsd>.pkl artifacts for bundled XSDs so the built app starts warm."""
+    if not os.path.isdir(SCHEMAS_DIR):
+        return
+    try:
+        from swift_iso_validator import precompile_schema
+    except Exception as e:
+        print(f"Skipping schema precompilation (validator unavailable: {e})")
+        return
+    for fname in sorted(os.listdir(SCHEMAS_DIR)):
+        if not fname.lower().endswith(".xsd"):
+            continue
+        try:
+            print(f"Precompiled schema: {precompile_schema(os.path.join(SCHEMAS_DIR, fname))}")
+        except Exception as e:
+            print(f"Failed to precompile {fname}: {e}")
+
 def build_with_pyinstaller():
     try:
         import PyInstaller  # noqa: F401
@@ -38,6 +56,8 @@ def build_with_pyinstaller():
         "--name", APP_NAME,
         "--onedir",
         "--add-data", add_data,
+        # loaded lazily through optional_deps, so PyInstaller cannot see it
+        "--hidden-import", "paramiko",
         ENTRY_SCRIPT
     ]
 
@@ -68,6 +88,7 @@ def extract_logo_to_dist():
         print(f"Failed to copy logo to dist: {e}")
 
 def main():
+    precompile_schemas()
     build_with_pyinstaller()
     extract_logo_to_dist()
     print("Build helper finished. Please verify the distribution and contained assets.")
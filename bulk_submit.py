@@ -0,0 +1,338 @@
+"""
+bulk_submit.py
+
+Submit many messages to the gateway (e.g. end-of-day files) with bounded
+concurrency, optional batching, a rate limit and a resumable result ledger.
+
+Usage:
+  python bulk_submit.py payments.csv --base-url https://api.example.com --token $TOKEN \\
+      --ledger payments.ledger.jsonl [--concurrency 8] [--batch-size 50] [--rate 20]
+  python bulk_submit.py payloads.jsonl --stub --ledger out.jsonl     # local stub gateway
+
+Input (read lazily, one message at a time):
+  - CSV with a header row: type, reference, ordering_name, ordering_account,
+    beneficiary_name, beneficiary_account, amount, currency, remittance, body and
+    sender_bic / sender_bank_name / sender_bank_address / sender_account_name /
+    sender_account_iban (folded into the "sender" object the client UI sends);
+  - JSON Lines, one /messages/create payload per line ("-" reads stdin).
+
+Ledger:
+  One JSON line per message, appended as results arrive:
+  {"key": ..., "line": n, "status": "ok" | "error", "message_id": ..., "error": ...}
+  The key is the payload's reference (or "#<line>" without one). Re-running with
+  the same ledger skips messages already recorded as "ok", so an interrupted or
+  partly failed run can be resumed.
+
+Functions:
+  - iter_payloads(source, fmt=None) -> iterator of (line, payload)
+  - submit_bulk(payloads, client, token=None, ledger_path=None, concurrency=8,
+                batch_size=1, rate_limit=None, progress=None) -> counts
+
+Notes:
+ - batch_size > 1 posts {"messages": [...]} to /messages/batch. If the gateway
+   answers 404/405 there, the run falls back to one /messages/create per message.
+ - POSTs are not retried automatically (see gateway_client.py); failures are
+   recorded in the ledger and picked up by the next run.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+
+import requests
+
+from gateway_client import GatewayClient
+
+SENDER_COLUMNS = {
+    "sender_bic": "bic",
+    "sender_bank_name": "bank_name",
+    "sender_bank_address": "bank_address",
+    "sender_account_name": "account_name",
+    "sender_account_iban": "account_iban",
+}
+
+Token = Union[None, str, Callable[[], Optional[str]]]
+
+
+# --- Input ----------------------------------------------------------------------
+
+def _csv_payload(row: Dict[str, str]) -> Dict[str, Any]:
+    payload: Dict[str, Any] = {}
+    sender: Dict[str, str] = {}
+    for column, value in row.items():
+        if column is None or value in (None, ""):
+            continue
+        if column in SENDER_COLUMNS:
+            sender[SENDER_COLUMNS[column]] = value
+        else:
+            payload[column] = value
+    if sender:
+        payload["sender"] = sender
+    return payload
+
+
+def iter_payloads(source: str, fmt: Optional[str] = None) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line number, payload) from a CSV or JSON Lines file ("-" = stdin)."""
+    if fmt is None:
+        fmt = "jsonl" if os.path.splitext(source)[1].lower() in (".jsonl", ".ndjson") else "csv"
+    if source == "-":
+        f = io.TextIOWrapper(sys.stdin.buffer, encoding="utf-8", newline="")
+    else:
+        f = open(source, "r", encoding="utf-8", newline="")
+    with f:
+        if fmt == "jsonl":
+            for n, line in enumerate(f, 1):
+                if line.strip():
+                    yield n, json.loads(line)
+        else:
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, _csv_payload(row)
+
+
+# --- Ledger ---------------------------------------------------------------------
+
+class Ledger:
+    """Append-only JSON Lines result log; thread-safe, flushed after every record."""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+        if self._file is not None and not self._ends_with_newline(path):
+            # An interrupted run can leave a torn last line; start on a fresh one
+            # so the next record is not glued onto it and lost on resume.
+            self._file.write("\n")
+            self._file.flush()
+
+    @staticmethod
+    def _ends_with_newline(path: str) -> bool:
+        with open(path, "rb") as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    @staticmethod
+    def completed(path: Optional[str]) -> Set[str]:
+        """Keys recorded as "ok" in an existing ledger."""
+        done: Set[str] = set()
+        if not path or not os.path.exists(path):
+            return done
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # torn last line of an interrupted run
+                if record.get("status") == "ok":
+                    done.add(record["key"])
+        return done
+
+    def write(self, record: Dict[str, Any]) -> None:
+        if self._file is None:
+            return
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+# --- Rate limiting --------------------------------------------------------------
+
+class RateLimiter:
+    """Token bucket: at most `rate` acquisitions per second on average, bursts up to `burst`."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+# --- Submission -------------------------------------------------------------------
+
+class _Sender:
+    def __init__(self, client: GatewayClient, token: Token, batch_size: int,
+                 limiter: Optional[RateLimiter]):
+        self.client = client
+        self.token = token
+        self.batching = batch_size > 1
+        self.limiter = limiter
+
+    def _token(self) -> Optional[str]:
+        return self.token() if callable(self.token) else self.token
+
+    def _post(self, path: str, data: Any) -> Any:
+        if self.limiter:
+            self.limiter.acquire()
+        return self.client.post_json(path, token=self._token(), data=data)
+
+    def send(self, batch: List[Tuple[int, str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Submit one batch; returns one ledger record per message (never raises)."""
+        if self.batching and len(batch) > 1:
+            try:
+                res = self._post("/messages/batch", {"messages": [p for _, _, p in batch]})
+                results = res.get("results") or []
+                if len(results) == len(batch):
+                    return [self._record(item, r) for item, r in zip(batch, results)]
+                error = f"batch response has {len(results)} results for {len(batch)} messages"
+                return [self._error(item, error) for item in batch]
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code not in (404, 405):
+                    return [self._error(item, e) for item in batch]
+                self.batching = False  # gateway has no batch endpoint
+            except Exception as e:
+                return [self._error(item, e) for item in batch]
+        records = []
+        for item in batch:
+            try:
+                records.append(self._record(item, self._post("/messages/create", item[2])))
+            except Exception as e:
+                records.append(self._error(item, e))
+        return records
+
+    @staticmethod
+    def _record(item, result: Dict[str, Any]) -> Dict[str, Any]:
+        line, key, _ = item
+        mid = result.get("message_id") or result.get("id")
+        if not mid:
+            return _Sender._error(item, result.get("error") or "no message_id in response")
+        return {"key": key, "line": line, "status": "ok", "message_id": mid}
+
+    @staticmethod
+    def _error(item, error) -> Dict[str, Any]:
+        line, key, _ = item
+        return {"key": key, "line": line, "status": "error", "error": str(error)}
+
+
+def _batches(payloads: Iterable[Tuple[int, Dict[str, Any]]], done: Set[str], size: int,
+             counts: Dict[str, int]) -> Iterator[List[Tuple[int, str, Dict[str, Any]]]]:
+    batch: List[Tuple[int, str, Dict[str, Any]]] = []
+    for line, payload in payloads:
+        key = str(payload.get("reference") or f"#{line}")
+        if key in done:
+            counts["skipped"] += 1
+            continue
+        batch.append((line, key, payload))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def submit_bulk(payloads: Iterable[Tuple[int, Dict[str, Any]]], client: GatewayClient,
+                token: Token = None, ledger_path: Optional[str] = None,
+                concurrency: int = 8, batch_size: int = 1,
+                rate_limit: Optional[float] = None,
+                progress: Optional[Callable[[Dict[str, int]], None]] = None) -> Dict[str, int]:
+    """
+    Submit (line, payload) pairs, e.g. from iter_payloads(). token is a string or a
+    callable returning the current token. At most `concurrency` requests are in
+    flight and at most 2 x concurrency batches are read ahead, so memory does not
+    depend on input size. rate_limit caps requests per second. progress(counts) is
+    called after every batch. Returns {"ok", "error", "skipped"} counts.
+    """
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    done = Ledger.completed(ledger_path)
+    ledger = Ledger(ledger_path)
+    sender = _Sender(client, token, batch_size, RateLimiter(rate_limit) if rate_limit else None)
+    window = threading.BoundedSemaphore(concurrency * 2)
+    lock = threading.Lock()
+
+    def finished(future):
+        try:
+            for record in future.result():
+                ledger.write(record)
+                with lock:
+                    counts[record["status"]] += 1
+            if progress:
+                with lock:
+                    snapshot = dict(counts)
+                progress(snapshot)
+        finally:
+            window.release()
+
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bulk-submit") as pool:
+            for batch in _batches(payloads, done, max(1, batch_size), counts):
+                window.acquire()
+                pool.submit(sender.send, batch).add_done_callback(finished)
+    finally:
+        ledger.close()
+    return counts
+
+
+# --- CLI ------------------------------------------------------------------------
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bulk-submit messages to the gateway")
+    parser.add_argument("source", help="CSV or JSON Lines file ('-' for stdin)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Input format (default: from the extension)")
+    parser.add_argument("--base-url", default=os.environ.get("SWIFT_API_BASE_URL"), help="Gateway base URL")
+    parser.add_argument("--api-key", default=os.environ.get("SWIFT_API_KEY"))
+    parser.add_argument("--token", default=os.environ.get("SWIFT_API_TOKEN"), help="Bearer token")
+    parser.add_argument("--stub", action="store_true", help="Submit to a local stub gateway (gateway_stub.py)")
+    parser.add_argument("--ledger", help="JSON Lines result ledger; existing 'ok' entries are skipped")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=1, help="Messages per request (uses /messages/batch)")
+    parser.add_argument("--rate", type=float, default=None, help="Max requests per second")
+    args = parser.parse_args(argv)
+
+    stub = None
+    if args.stub:
+        from gateway_stub import StubGateway
+        stub = StubGateway().start()
+        args.base_url = stub.url
+    if not args.base_url:
+        parser.error("--base-url (or SWIFT_API_BASE_URL) is required unless --stub is given")
+
+    def report(counts):
+        total = counts["ok"] + counts["error"]
+        if total % 500 == 0:
+            print(f"  {total} submitted ({counts['error']} errors)", file=sys.stderr)
+
+    client = GatewayClient(args.base_url, api_key=args.api_key, pool_maxsize=max(args.concurrency, 1))
+    start = time.monotonic()
+    try:
+        counts = submit_bulk(iter_payloads(args.source, args.format), client, token=args.token,
+                             ledger_path=args.ledger, concurrency=args.concurrency,
+                             batch_size=args.batch_size, rate_limit=args.rate, progress=report)
+    except (OSError, ValueError) as e:
+        print(f"Bulk submit failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        client.close()
+        if stub is not None:
+            stub.stop()
+    elapsed = time.monotonic() - start
+    print(f"ok={counts['ok']} error={counts['error']} skipped={counts['skipped']} in {elapsed:.1f}s")
+    return 0 if counts["error"] == 0 else 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
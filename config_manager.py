@@ -9,7 +9,15 @@ Stores a small JSON config at ./config.json with keys:
 
 Functions:
   - load_config() -> dict
-  - save_config(data: dict) -> None
+  - get_setting(key, default=None) -> value       (no copy; for hot paths)
+  - save_config(data: dict) -> None                (merges data into the stored config)
+
+This is the only reader/writer of config.json; the Streamlit app and fetch_logo.py
+use it too. The parsed file is memoized and re-read only when its mtime or size
+changes. save_config does its read-modify-write under a lock (a threading lock
+plus an flock on config.json.lock where available) and replaces the file
+atomically (temp file + rename), so concurrent Streamlit sessions neither lose
+updates nor read a half-written file.
 
 This is intentionally small and synchronous (file-based). It is suitable for
 local deployments and the Streamlit demo. For multi-user production use a
@@ -18,10 +26,22 @@ centralized configuration store (database, key/value store, or vault).
 
 import json
 import os
-from typing import Dict, Any
+import tempfile
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import fcntl  # cross-process write lock (POSIX)
+except ImportError:
+    fcntl = None
 
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), "config.json")
 
+_lock = threading.RLock()
+# (file stamp, parsed config), swapped as one object so lock-free readers see a consistent pair
+_cached: Optional[Tuple[Optional[Tuple[str, int, int]], Dict[str, Any]]] = None
+
 
 def _default_config() -> Dict[str, Any]:
     return {
@@ -30,29 +50,79 @@ def _default_config() -> Dict[str, Any]:
     }
 
 
-def load_config() -> Dict[str, Any]:
-    """Load config from disk; return defaults if missing or invalid."""
-    if not os.path.exists(CONFIG_FILE):
-        return _default_config()
+def _stamp() -> Optional[Tuple[str, int, int]]:
     try:
-        with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        # Ensure keys exist
+        st = os.stat(CONFIG_FILE)
+    except OSError:
+        return None
+    return (CONFIG_FILE, st.st_mtime_ns, st.st_size)
+
+
+def _current() -> Dict[str, Any]:
+    """The memoized config (shared; do not mutate), re-read if the file changed."""
+    global _cached
+    stamp = _stamp()
+    cached = _cached
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    with _lock:
         cfg = _default_config()
-        cfg.update({k: data.get(k, cfg[k]) for k in cfg.keys()})
+        if stamp is not None:
+            try:
+                with open(CONFIG_FILE, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if isinstance(data, dict):
+                    cfg.update(data)
+            except Exception:
+                # Avoid failing the app for simple config issues
+                pass
+        _cached = (stamp, cfg)
         return cfg
-    except Exception:
-        # Avoid failing the app for simple config issues
-        return _default_config()
+
+
+def load_config() -> Dict[str, Any]:
+    """Load config (a copy the caller may modify); defaults if missing or invalid."""
+    return dict(_current())
+
+
+def get_setting(key: str, default: Any = None) -> Any:
+    """Return one config value without copying the config."""
+    value = _current().get(key)
+    return default if value is None else value
+
+
+@contextmanager
+def _write_lock():
+    with _lock:
+        if fcntl is None:
+            yield
+            return
+        with open(CONFIG_FILE + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
 
 
 def save_config(data: Dict[str, Any]) -> None:
-    """Save provided keys (schema_path, logo_path) to the config file."""
-    cfg = _default_config()
-    cfg.update({k: data.get(k, cfg[k]) for k in cfg.keys()})
-    try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, indent=2)
-    except Exception as e:
-        # Quietly fail - caller can show message
-        raise
\ No newline at end of file
+    """Merge the provided keys into the stored config and write it atomically."""
+    global _cached
+    with _write_lock():
+        cfg = dict(_current())
+        cfg.update(data)
+        directory = os.path.dirname(os.path.abspath(CONFIG_FILE))
+        fd, tmp = tempfile.mkstemp(prefix=".config-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(cfg, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, CONFIG_FILE)
+        except BaseException:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+            raise
+        _cached = (_stamp(), cfg)
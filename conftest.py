@@ -0,0 +1,17 @@
+import pytest
+
+
+@pytest.fixture
+def download_button_accepts():
+    """Whether st.download_button(data=...) accepts an object (Streamlit's own converter)."""
+    pytest.importorskip("streamlit")
+    from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+    def accepts(data) -> bool:
+        try:
+            convert_data_to_bytes_and_infer_mime(data, ValueError("Invalid binary data format"))
+            return True
+        except ValueError:
+            return False
+
+    return accepts
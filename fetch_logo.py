@@ -11,12 +11,12 @@ import os
 import sys
 import argparse
 import requests
-import json
+
+from config_manager import save_config
 
 ROOT_DIR = os.path.dirname(__file__)
 ASSETS_DIR = os.path.join(ROOT_DIR, "assets")
 os.makedirs(ASSETS_DIR, exist_ok=True)
-CONFIG_FILE = os.path.join(ROOT_DIR, "config.json")
 
 def choose_extension(url: str, content_type: str) -> str:
     content_type = (content_type or "").lower()
@@ -38,17 +38,8 @@ def download_logo(url: str) -> str:
     return fname
 
 def update_config_with_logo(path: str):
-    cfg = {}
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                cfg = json.load(f)
-        except Exception:
-            cfg = {}
-    cfg["logo_path"] = path
     try:
-        with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-            json.dump(cfg, f, indent=2)
+        save_config({"logo_path": path})
     except Exception as e:
         print("Failed to write config.json:", e, file=sys.stderr)
 
@@ -0,0 +1,239 @@
+"""
+gateway_client.py
+
+Shared HTTP client for the SWIFT-Alliance-like gateway and auth services.
+
+One requests.Session per (base URL, API key) with a tuned urllib3 connection pool,
+so submissions and status polls reuse keep-alive connections instead of opening a
+new TCP+TLS connection per call. Static headers (API key) are set once.
+
+Usage:
+  client = get_client("https://api.example.com", api_key="...")
+  res = client.post_json("/messages/create", token=token, data=payload)
+  status = client.get("/messages/<id>/status", token=token)
+
+Functions:
+  - get_client(base_url, api_key=None, **options) -> GatewayClient   (one per base_url/key)
+  - GatewayClient.request(method, path, token=None, timeout=None, **kwargs) -> requests.Response
+  - GatewayClient.post_json(path, token=None, data=None, files=None, timeout=None) -> JSON
+  - GatewayClient.get(path, token=None, params=None, timeout=None) -> JSON or bytes
+  - GatewayClient.download(path, token=None, params=None, dest=None, timeout=None)
+        -> (file object positioned at 0, content type); close it when done
+
+Notes:
+ - Retries with exponential backoff: connection errors for every method (the
+   request never reached the server), and 500/502/503/504 responses only for
+   idempotent methods (GET, HEAD, ...), so a POST is not submitted twice.
+   Retry-After headers are honoured.
+ - Timeouts are per call: (connect, read) seconds; DEFAULT_TIMEOUT unless given.
+ - get() picks the decoder from the Content-Type header (JSON or raw bytes) instead
+   of attempting to parse every body as JSON.
+ - download() streams the body in DOWNLOAD_CHUNK_SIZE chunks into dest (default:
+   a temp file that is deleted on close), so large PDFs and archives never sit on the heap
+   as one bytes object. JSON bodies carrying the document inline
+   ({"pdf_b64": ...} or {"txt"/"content": ...}, see JSON_DOCUMENT_FIELDS) are
+   unpacked into dest; a top-level base64 field is decoded as it arrives.
+ - The session is shared between threads (Streamlit sessions). Only the connection
+   pool is mutated after construction; per-call headers are passed per request.
+"""
+import base64
+import json
+import re
+import threading
+from typing import Any, BinaryIO, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from temp_files import write_temp_file
+
+DEFAULT_TIMEOUT: Tuple[float, float] = (5.0, 30.0)
+DEFAULT_POOL_MAXSIZE = 16
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUSES = (500, 502, 503, 504)
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# JSON download responses: field -> encoding of the inlined document
+JSON_DOCUMENT_FIELDS = (("pdf_b64", "base64"), ("txt", "text"), ("content", "text"))
+
+Timeout = Union[float, Tuple[float, float]]
+
+
+def _is_json(content_type: str) -> bool:
+    mime = content_type.split(";", 1)[0].strip().lower()
+    return mime == "application/json" or mime.endswith("+json")
+
+
+def _b64_field_pattern() -> "re.Pattern[bytes]":
+    # a top-level base64 field, preceded only by scalar members: {"a": "x", "n": 1, "pdf_b64": "
+    fields = b"|".join(re.escape(f.encode()) for f, enc in JSON_DOCUMENT_FIELDS if enc == "base64")
+    scalar = rb'(?:"[^"\\]*(?:\\.[^"\\]*)*"|[-+.\w]+)'  # unrolled: no per-char backtracking
+    return re.compile(rb'\s*\{\s*(?:' + scalar + rb'\s*:\s*' + scalar + rb'\s*,\s*)*"(' + fields + rb')"\s*:\s*"')
+
+
+_B64_FIELD = _b64_field_pattern()
+
+
+def _read_up_to(raw, size: int) -> bytes:
+    data = b""
+    while len(data) < size:
+        chunk = raw.read(size - len(data))
+        if not chunk:
+            break
+        data += chunk
+    return data
+
+
+def _stream_b64(raw, rest: bytes, dest: BinaryIO) -> None:
+    """Decode a JSON base64 string value (opening quote consumed) from raw into dest."""
+    pending = b""
+    while True:
+        end = rest.find(b'"')
+        done = end >= 0
+        if done:
+            rest = rest[:end]
+        carry = b""
+        if not done and rest.endswith(b"\\") and (len(rest) - len(rest.rstrip(b"\\"))) % 2:
+            rest, carry = rest[:-1], b"\\"  # escape split across chunks
+        if b"\\" in rest:
+            rest = rest.replace(b"\\/", b"/").replace(b"\\n", b"").replace(b"\\r", b"")
+        data = pending + b"".join(rest.split())
+        cut = len(data) if done else len(data) // 4 * 4
+        dest.write(base64.b64decode(data[:cut], validate=True))
+        if done:
+            return
+        pending = data[cut:]
+        rest = carry + raw.read(DOWNLOAD_CHUNK_SIZE)
+        if rest == carry:
+            raise ValueError("JSON download response ended inside the document")
+
+
+def _write_json_document(raw, dest: BinaryIO) -> str:
+    """Write the document inlined in a JSON download response to dest; return its field."""
+    head = _read_up_to(raw, DOWNLOAD_CHUNK_SIZE)
+    match = _B64_FIELD.match(head)
+    if match:
+        # common case: decode the base64 value as it arrives, never holding all of it
+        _stream_b64(raw, head[match.end():], dest)
+        return match.group(1).decode()
+    doc = json.loads(head + raw.read())
+    if isinstance(doc, dict):
+        for field, encoding in JSON_DOCUMENT_FIELDS:
+            value = doc.get(field)
+            if not isinstance(value, str):
+                continue
+            if encoding == "text":
+                dest.write(value.encode("utf-8"))
+            else:
+                dest.write(base64.b64decode("".join(value.split()), validate=True))
+            return field
+    raise ValueError("JSON download response contains no document field "
+                     f"({', '.join(f for f, _ in JSON_DOCUMENT_FIELDS)})")
+
+
+class GatewayClient:
+    def __init__(self, base_url: str, api_key: Optional[str] = None,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 retries: int = DEFAULT_RETRIES,
+                 backoff_factor: float = DEFAULT_BACKOFF,
+                 timeout: Timeout = DEFAULT_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,  # idempotent only
+            raise_on_status=False,  # hand the last 5xx response to raise_for_status()
+            respect_retry_after_header=True,
+        )
+        # pool_maxsize bounds the keep-alive connections per host; calls beyond it
+        # wait for a free connection instead of opening throwaway ones
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize,
+                              max_retries=retry, pool_block=True)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        if api_key:
+            self.session.headers["X-API-Key"] = api_key
+
+    def url(self, path: str) -> str:
+        return self.base_url + "/" + path.lstrip("/")
+
+    def request(self, method: str, path: str, token: Optional[str] = None,
+                timeout: Optional[Timeout] = None, **kwargs) -> requests.Response:
+        """Send one request through the pooled session; raises for 4xx/5xx."""
+        headers = dict(kwargs.pop("headers", None) or {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        resp = self.session.request(method, self.url(path), headers=headers,
+                                    timeout=timeout or self.timeout, **kwargs)
+        try:
+            resp.raise_for_status()
+        except requests.HTTPError:
+            resp.close()  # hand a streamed connection back to the pool
+            raise
+        return resp
+
+    def post_json(self, path: str, token: Optional[str] = None, data=None, files=None,
+                  timeout: Optional[Timeout] = None) -> Any:
+        return self.request("POST", path, token=token, json=data, files=files, timeout=timeout).json()
+
+    def get(self, path: str, token: Optional[str] = None, params=None,
+            timeout: Optional[Timeout] = None) -> Any:
+        resp = self.request("GET", path, token=token, params=params, timeout=timeout)
+        if _is_json(resp.headers.get("Content-Type", "")):
+            return resp.json()
+        return resp.content
+
+    def download(self, path: str, token: Optional[str] = None, params=None,
+                 dest: Optional[BinaryIO] = None,
+                 timeout: Optional[Timeout] = None) -> Tuple[BinaryIO, str]:
+        """
+        Stream a document into dest and return (dest rewound to 0, content type).
+        Without dest, returns a temp_files.TempFileReader (accepted by
+        st.download_button; deleted on close). A JSON body is unpacked via
+        JSON_DOCUMENT_FIELDS; the returned content type is then the JSON one.
+        """
+        content_type = ""
+
+        def write(out: BinaryIO) -> None:
+            nonlocal content_type
+            with self.request("GET", path, token=token, params=params,
+                              timeout=timeout, stream=True) as resp:
+                content_type = resp.headers.get("Content-Type", "application/octet-stream")
+                if _is_json(content_type):
+                    resp.raw.decode_content = True
+                    _write_json_document(resp.raw, out)
+                else:
+                    for chunk in resp.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        out.write(chunk)
+
+        if dest is None:
+            return write_temp_file(write), content_type
+        write(dest)
+        dest.flush()
+        dest.seek(0)
+        return dest, content_type
+
+    def close(self) -> None:
+        self.session.close()
+
+
+_CLIENTS: Dict[Tuple[str, Optional[str]], GatewayClient] = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def get_client(base_url: str, api_key: Optional[str] = None, **options) -> GatewayClient:
+    """Return the process-wide GatewayClient for (base_url, api_key); options apply on creation."""
+    key = (base_url.rstrip("/"), api_key)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = _CLIENTS[key] = GatewayClient(base_url, api_key=api_key, **options)
+        return client
@@ -0,0 +1,221 @@
+"""
+gateway_stub.py
+
+In-process stub of the message gateway for demos, benchmarks and load tests.
+Nothing here talks to a real service.
+
+Usage:
+  with StubGateway() as stub:
+      client = GatewayClient(stub.url)
+      client.post_json("/messages/create", data={...})
+      print(stub.connections, stub.requests)
+
+  python gateway_stub.py --port 8080      # serve until Ctrl+C
+
+Endpoints:
+  - POST /auth/login                 -> {"access_token": ..., "expires_in": ...}
+  - POST /messages/create            -> {"message_id": ...}
+  - POST /messages/batch             {"messages": [...]} -> {"results": [{"message_id": ...}, ...]}
+  - GET  /messages/<id>/status       -> {"message_id": ..., "state": ...}
+  - GET  /messages/status?ids=a,b,c  -> {"statuses": [{"message_id": ..., "state": ...}, ...]}
+  - GET  /messages/<id>/download     -> the message body as text/plain
+         ?format=pdf                 -> the body wrapped as application/pdf bytes
+         ?format=pdf&encoding=base64 -> {"pdf_b64": ...} (legacy JSON form)
+  - GET  /ping                       -> {"ok": true}
+
+Notes:
+ - HTTP/1.1 with keep-alive, so connection reuse is observable: `connections`
+   counts accepted TCP connections, `requests` counts requests.
+ - fail_next(n, status=503) makes the next n requests fail, to exercise retries.
+ - Messages move QUEUED -> PROCESSING -> SENT over successive status reads;
+   with nack_every=n every n-th created message ends NACKED instead.
+"""
+import argparse
+import base64
+import json
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs
+
+STATES = ("QUEUED", "PROCESSING", "SENT")
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # keep-alive replies must not wait for delayed ACKs
+    server: "_Server"
+
+    def log_message(self, format, *args):
+        pass
+
+    def setup(self):
+        super().setup()
+        with self.server.stub._lock:
+            self.server.stub.connections += 1
+
+    def _send(self, status: int, body: Any, content_type: str = "application/json") -> None:
+        data = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _body(self) -> Any:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"null") if length else None
+
+    def _dispatch(self, method: str) -> None:
+        stub = self.server.stub
+        body = self._body() if method == "POST" else None
+        with stub._lock:
+            stub.requests += 1
+            if stub._fail_remaining > 0:
+                stub._fail_remaining -= 1
+                status = stub._fail_status
+            else:
+                status = None
+        if status:
+            self._send(status, {"error": "injected failure"})
+            return
+        path, _, query = self.path.partition("?")
+        self._send(*stub.handle(method, path, body, parse_qs(query)))
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    stub: "StubGateway"
+
+
+class StubGateway:
+    """Threaded stub gateway on 127.0.0.1 (port 0 = pick a free port)."""
+
+    def __init__(self, port: int = 0, token_ttl: int = 3600, batch_enabled: bool = True,
+                 nack_every: int = 0):
+        self.token_ttl = token_ttl
+        self.batch_enabled = batch_enabled
+        self.nack_every = nack_every
+        self._created = 0
+        self.connections = 0
+        self.requests = 0
+        self.messages: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._fail_remaining = 0
+        self._fail_status = 503
+        self._server = _Server(("127.0.0.1", port), _Handler)
+        self._server.stub = self
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail_next(self, n: int, status: int = 503) -> None:
+        with self._lock:
+            self._fail_remaining, self._fail_status = n, status
+
+    def reset_counters(self) -> None:
+        with self._lock:
+            self.connections = 0
+            self.requests = 0
+
+    # --- request handling ----------------------------------------------------------
+    def _create(self, payload: Any) -> str:
+        mid = f"stub-{uuid.uuid4().hex[:12]}"
+        self._created += 1
+        nacked = bool(self.nack_every) and self._created % self.nack_every == 0
+        self.messages[mid] = {"payload": payload, "reads": 0, "nacked": nacked}
+        return mid
+
+    def _status(self, mid: str) -> Dict[str, Any]:
+        msg = self.messages[mid]
+        state = STATES[min(msg["reads"], len(STATES) - 1)]
+        if state == "SENT" and msg["nacked"]:
+            state = "NACKED"
+        msg["reads"] += 1
+        return {"message_id": mid, "state": state}
+
+    def _document(self, mid: str, query: Dict[str, List[str]]):
+        msg = self.messages[mid]
+        variant = (tuple(query.get("format", [])), tuple(query.get("encoding", [])))
+        # built once per variant, so serving a large document allocates nothing new
+        if variant not in msg.setdefault("documents", {}):
+            text = str((msg["payload"] or {}).get("body", "")).encode("utf-8")
+            if variant[0] != ("pdf",):
+                doc = (200, text, "text/plain; charset=utf-8")
+            else:
+                pdf = b"%PDF-1.4\n% stub document\n" + text + b"\n%%EOF\n"
+                if variant[1] == ("base64",):
+                    doc = (200, b'{"pdf_b64": "' + base64.b64encode(pdf) + b'"}', "application/json")
+                else:
+                    doc = (200, pdf, "application/pdf")
+            msg["documents"][variant] = doc
+        return msg["documents"][variant]
+
+    def handle(self, method: str, path: str, body: Any, query: Optional[Dict[str, List[str]]] = None):
+        """Return (status, JSON-able body) or (status, bytes, content type)."""
+        parts = [p for p in path.split("/") if p]
+        query = query or {}
+        with self._lock:
+            if method == "GET" and parts == ["ping"]:
+                return 200, {"ok": True}
+            if method == "POST" and parts == ["auth", "login"]:
+                return 200, {"access_token": f"stub-token-{uuid.uuid4().hex[:8]}", "expires_in": self.token_ttl}
+            if method == "POST" and parts == ["messages", "create"]:
+                return 200, {"message_id": self._create(body)}
+            if method == "POST" and parts == ["messages", "batch"] and self.batch_enabled:
+                return 200, {"results": [{"message_id": self._create(p)} for p in (body or {}).get("messages", [])]}
+            if method == "GET" and parts == ["messages", "status"]:
+                ids = [i for v in query.get("ids", []) for i in v.split(",") if i]
+                return 200, {"statuses": [self._status(i) if i in self.messages
+                                          else {"message_id": i, "state": "UNKNOWN"} for i in ids]}
+            if method == "GET" and len(parts) == 3 and parts[0] == "messages" and parts[2] == "status":
+                if parts[1] not in self.messages:
+                    return 404, {"error": "unknown message"}
+                return 200, self._status(parts[1])
+            if method == "GET" and len(parts) == 3 and parts[0] == "messages" and parts[2] == "download":
+                if parts[1] not in self.messages:
+                    return 404, {"error": "unknown message"}
+                return self._document(parts[1], query)
+        return 404, {"error": "not found"}
+
+    # --- lifecycle -----------------------------------------------------------------
+    def start(self) -> "StubGateway":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="stub-gateway", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "StubGateway":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the stub message gateway")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+    stub = StubGateway(args.port)
+    print(f"Stub gateway on {stub.url} (Ctrl+C to stop)")
+    try:
+        stub._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
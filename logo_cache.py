@@ -0,0 +1,135 @@
+"""
+logo_cache.py
+
+Cache of logo images ready to draw on a reportlab canvas.
+
+An SVG logo used to be rasterized with cairosvg on every PDF export (temp PNG in
+assets/, ImageReader, delete). Here each logo is decoded once per
+(source path, mtime, size, output width):
+  - in memory: the ImageReader, shared by all exports in the process
+    (Streamlit reruns and sessions included);
+  - on disk: the rasterized PNG of an SVG, under assets/.logo_cache/, so a
+    restarted server does not rasterize again either.
+Replacing the logo file changes its mtime/size, so the next export picks it up;
+older PNGs of the same source are removed from the disk cache then.
+
+Usage:
+  from logo_cache import get_logo_reader
+  c.drawImage(get_logo_reader(path), x, y, width=w, height=h, preserveAspectRatio=True)
+
+Functions:
+  - get_logo_reader(path, output_width=1024) -> reportlab ImageReader
+  - rasterize_logo(path, output_width=1024) -> path to a PNG (the source itself for rasters)
+  - clear_logo_cache(disk=False) -> None
+
+Notes:
+ - reportlab is required; cairosvg is needed for SVG sources (without it the SVG
+   is handed to ImageReader as before, which normally fails and is logged by the
+   caller).
+"""
+import hashlib
+import io
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Tuple
+
+from optional_deps import optional
+
+# imported on first use (see optional_deps.py)
+reportlab_utils = optional("reportlab.lib.utils")
+HAS_REPORTLAB = reportlab_utils
+cairosvg = optional("cairosvg")
+HAS_CAIROSVG = cairosvg
+
+ROOT_DIR = os.path.dirname(__file__)
+CACHE_DIR = os.path.join(ROOT_DIR, "assets", ".logo_cache")
+DEFAULT_WIDTH = 1024
+MAX_ENTRIES = 8
+
+_lock = threading.Lock()
+_readers: "OrderedDict[Tuple[str, int, int, int], object]" = OrderedDict()
+
+
+def _key(path: str, output_width: int) -> Tuple[str, int, int, int]:
+    real = os.path.realpath(path)
+    st = os.stat(real)
+    return (real, st.st_mtime_ns, st.st_size, int(output_width))
+
+
+def _disk_path(key: Tuple[str, int, int, int]) -> Tuple[str, str]:
+    """(cache file for key, filename prefix shared by all versions of the same source)"""
+    prefix = hashlib.sha256(key[0].encode("utf-8")).hexdigest()[:16]
+    version = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(CACHE_DIR, f"{prefix}-{version}.png"), prefix + "-"
+
+
+def _rasterize_svg(key: Tuple[str, int, int, int]) -> str:
+    png_path, prefix = _disk_path(key)
+    if os.path.exists(png_path):
+        return png_path
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    png = cairosvg.svg2png(url=key[0], output_width=key[3])
+    fd, tmp = tempfile.mkstemp(prefix=".logo-", suffix=".tmp", dir=CACHE_DIR)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(png)
+        os.replace(tmp, png_path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    # drop PNGs of earlier versions of this logo
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(prefix) and os.path.join(CACHE_DIR, name) != png_path:
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+            except OSError:
+                pass
+    return png_path
+
+
+def rasterize_logo(path: str, output_width: int = DEFAULT_WIDTH) -> str:
+    """Return a raster image path for path: the cached PNG for an SVG, else path itself."""
+    if path.lower().endswith(".svg") and HAS_CAIROSVG:
+        return _rasterize_svg(_key(path, output_width))
+    return path
+
+
+def get_logo_reader(path: str, output_width: int = DEFAULT_WIDTH):
+    """Return a (shared) ImageReader for the logo at path, decoding it at most once per version."""
+    if not HAS_REPORTLAB:
+        raise RuntimeError("reportlab not installed; cannot load logo. Install with 'pip install reportlab'.")
+    key = _key(path, output_width)
+    with _lock:
+        reader = _readers.get(key)
+        if reader is not None:
+            _readers.move_to_end(key)
+            return reader
+    # decode outside the lock; two sessions racing on a new logo both decode once
+    source = _rasterize_svg(key) if path.lower().endswith(".svg") and HAS_CAIROSVG else key[0]
+    with open(source, "rb") as f:
+        reader = reportlab_utils.ImageReader(io.BytesIO(f.read()))  # held in memory, independent of the file
+    reader.getSize()  # force the decode now rather than during drawImage
+    with _lock:
+        for stale in [k for k in _readers if k[0] == key[0] and k[3] == key[3] and k != key]:
+            del _readers[stale]
+        _readers[key] = reader
+        while len(_readers) > MAX_ENTRIES:
+            _readers.popitem(last=False)
+    return reader
+
+
+def clear_logo_cache(disk: bool = False) -> None:
+    """Forget decoded logos; with disk=True also delete the rasterized PNGs."""
+    with _lock:
+        _readers.clear()
+    if disk and os.path.isdir(CACHE_DIR):
+        for name in os.listdir(CACHE_DIR):
+            try:
+                os.remove(os.path.join(CACHE_DIR, name))
+            except OSError:
+                pass
@@ -0,0 +1,92 @@
+"""
+optional_deps.py
+
+Lazily imported optional dependencies with accurate HAS_* capability flags.
+
+The apps used to import every optional library (xmlschema, paramiko, reportlab,
+PIL, cairosvg, ...) at startup just to set their HAS_* flags. optional(name)
+returns a stand-in that imports the module the first time it is actually needed:
+testing it for truth or touching one of its attributes.
+
+Usage:
+  cairosvg = optional("cairosvg")
+  HAS_CAIROSVG = cairosvg            # same object; truthy only if the import works
+
+  if HAS_CAIROSVG:                   # first truth test imports cairosvg
+      cairosvg.svg2png(...)          # attributes are forwarded to the real module
+
+Functions:
+  - optional(name) -> OptionalDependency   (one shared instance per module name)
+  - OptionalDependency.module    -> the imported module (ImportError if unavailable)
+  - OptionalDependency.imported  -> True once successfully imported (never imports)
+
+Notes:
+ - A package that is installed but fails to import (e.g. cairosvg without the
+   cairo system library) reports False, the same as the old try/except flags.
+ - The import is attempted once per process; the result is cached.
+"""
+import importlib
+import threading
+from typing import Dict, Optional
+
+_MISSING = object()
+
+
+class OptionalDependency:
+    def __init__(self, name: str):
+        self._name = name
+        self._module = _MISSING
+        self._error: Optional[BaseException] = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._module is _MISSING:
+            with self._lock:
+                if self._module is _MISSING:
+                    try:
+                        module = importlib.import_module(self._name)
+                    except Exception as e:
+                        self._error = e
+                        module = None
+                    self._module = module
+        return self._module
+
+    @property
+    def module(self):
+        module = self._load()
+        if module is None:
+            raise ImportError(f"optional dependency '{self._name}' is not available: {self._error}")
+        return module
+
+    @property
+    def imported(self) -> bool:
+        return self._module is not _MISSING and self._module is not None
+
+    def __bool__(self) -> bool:
+        return self._load() is not None
+
+    def __getattr__(self, attr: str):
+        # only called for names not defined on this class
+        if attr.startswith("__") or attr in ("_name", "_module", "_error", "_lock"):
+            raise AttributeError(attr)
+        return getattr(self.module, attr)
+
+    def __repr__(self) -> str:
+        if self._module is _MISSING:
+            state = "not loaded"
+        else:
+            state = "available" if self._module is not None else f"unavailable ({self._error})"
+        return f"<optional {self._name}: {state}>"
+
+
+_DEPENDENCIES: Dict[str, OptionalDependency] = {}
+_DEPENDENCIES_LOCK = threading.Lock()
+
+
+def optional(name: str) -> OptionalDependency:
+    """Return the shared lazy stand-in for module name."""
+    with _DEPENDENCIES_LOCK:
+        dep = _DEPENDENCIES.get(name)
+        if dep is None:
+            dep = _DEPENDENCIES[name] = OptionalDependency(name)
+        return dep
@@ -0,0 +1,361 @@
+"""
+pdf_export.py
+
+PDF rendering of formal message outputs, for single downloads and for batch
+exports (e.g. a day's traffic for compliance).
+
+Usage:
+  python pdf_export.py messages.jsonl --out day.zip [--workers 8] [--logo assets/swift_logo.png]
+  python pdf_export.py messages.jsonl --out day.pdf --format pdf
+  python pdf_export.py exported_texts/ --out day.zip
+
+Input is either a directory of .txt files (one formal text each) or a JSON Lines
+file ("-" for stdin) with one object per message: {"text": "..."} for a ready
+formal text, or the build_formal_output() arguments (message_type, message_body,
+sender_info, start_ts, end_ts, account_number).
+
+Functions:
+  - build_formal_output(...) -> str                     (moved here from the Streamlit app)
+  - render_pdf(formal_text, dest, logo_path=None) -> None   (dest: path or binary stream)
+  - render_pdf_file(formal_text, logo_path=None) -> open temp file (for download buttons;
+                                                     deleted on close)
+  - generate_pdf_bytes(formal_text, logo_path=None) -> bytes
+  - draw_wrapped_text(c, text, x, y, font, size, leading, max_width, ...) -> y
+  - wrap_line(line, font, size, max_width) -> [str]     (font-metric wrapping)
+  - export_pdf_batch(texts, dest, fmt="zip", logo_path=None, workers=None,
+                     window=None, progress=None) -> int
+
+Notes:
+ - "zip" renders one PDF per message across a process pool and streams each into
+   the archive as it completes (in input order). Input is consumed lazily and at
+   most `window` renders are in flight, so memory does not grow with the batch.
+ - "pdf" writes one multi-document PDF. reportlab keeps a document's pages until
+   it is saved, so this mode renders in the calling process and its memory grows
+   with the page count; use "zip" for very large batches.
+ - render_pdf writes the document straight to its destination; reportlab still
+   holds one document's pages until save(), but nothing is copied into extra
+   BytesIO / bytes buffers.
+ - reportlab + pillow required; cairosvg optional for SVG logos (see logo_cache.py).
+"""
+import argparse
+import datetime
+import io
+import json
+import logging
+import os
+import sys
+import zipfile
+from collections import deque
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import logo_cache
+from optional_deps import optional
+from temp_files import write_temp_file
+
+# reportlab is imported on first render, not when this module is imported
+canvas = optional("reportlab.pdfgen.canvas")
+pagesizes = optional("reportlab.lib.pagesizes")
+pdfmetrics = optional("reportlab.pdfbase.pdfmetrics")
+HAS_REPORTLAB = canvas
+
+logger = logging.getLogger("pdf_export")
+
+FORMATS = ("zip", "pdf")
+
+
+def build_formal_output(message_type: str, message_body: str, sender_info: Dict[str, str], start_ts: str, end_ts: str, account_number: str) -> str:
+    header_lines = [
+        "INSTANT TYPE AND TRANSMISSION: INSTANT",
+        "",
+        "MESSAGE HEADER",
+        f"Message Type: {message_type}",
+        f"Reference: {datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')}",
+        f"Sender BIC: {sender_info.get('bic','')}",
+        f"Sender Bank: {sender_info.get('bank_name','')}",
+        f"Sender Address: {sender_info.get('bank_address','')}",
+        f"Account Name: {sender_info.get('account_name','')}",
+        f"Account IBAN: {sender_info.get('account_iban','')}",
+        f"Selected Account (from system): {account_number}",
+        "",
+        "MESSAGE TEXT",
+        message_body,
+        "",
+        "MESSAGE HAS BEEN TRANSMITTED SUCCESSFULLY",
+        "CONFIRMED & RECEIVED",
+        "",
+        f"Start Time: {start_ts}",
+        f"End Time:   {end_ts}"
+    ]
+    return "\n".join(header_lines)
+
+
+# --- Rendering ------------------------------------------------------------------
+
+# Per-font advance widths at size 1, filled on first use of each character.
+# Standard-font widths have no kerning, so a line's width is the plain sum.
+_CHAR_WIDTHS: Dict[str, Dict[str, float]] = {}
+
+
+def wrap_line(line: str, font: str, size: float, max_width: float) -> List[str]:
+    """
+    Split one line into pieces no wider than max_width points, breaking after the
+    last space that fits (or mid-word if a single word is too wide). The space at
+    a break is dropped, so no piece after the first starts with one. One pass over
+    the characters; each piece is sliced once.
+    """
+    widths = _CHAR_WIDTHS.setdefault(font, {})
+    limit = max_width / size
+    pieces: List[str] = []
+    start = 0
+    width = 0.0
+    space = -1          # index of the last space in the current piece
+    width_to_space = 0.0  # width of line[start:space + 1]
+    for i, ch in enumerate(line):
+        w = widths.get(ch)
+        if w is None:
+            w = widths[ch] = pdfmetrics.stringWidth(ch, font, 1)
+        # the remainder after a break at a space may still be too wide: check again
+        while width + w > limit and i > start:
+            if space > start:
+                pieces.append(line[start:space])
+                start = space + 1
+                width -= width_to_space
+                space = -1
+            else:
+                pieces.append(line[start:i])
+                start = i
+                width = 0.0
+        if ch == " " and i == start and pieces:
+            start = i + 1  # spaces at a break are not carried onto the next piece
+            continue
+        width += w
+        if ch == " ":
+            space, width_to_space = i, width
+    if start < len(line) or not pieces:
+        pieces.append(line[start:])
+    return pieces
+
+
+def draw_wrapped_text(c, text: str, x: float, y: float, font: str = "Helvetica", size: float = 10,
+                      leading: float = 14, max_width: Optional[float] = None,
+                      bottom: float = 60, top: Optional[float] = None) -> float:
+    """
+    Draw text (newlines kept, long lines wrapped to max_width) starting at baseline y,
+    continuing on new pages (from baseline top) below bottom. Each page's text goes
+    through one text object. Returns the baseline for whatever is drawn next.
+    """
+    page_w, page_h = c._pagesize
+    max_width = max_width if max_width is not None else page_w - x - 40
+    top = top if top is not None else page_h - 60
+    t = c.beginText(x, y)
+    t.setFont(font, size, leading)
+    for line in text.splitlines():
+        for piece in wrap_line(line, font, size, max_width):
+            if y < bottom:
+                c.drawText(t)
+                c.showPage()
+                y = top
+                t = c.beginText(x, y)
+                t.setFont(font, size, leading)
+            t.textLine(piece)
+            y -= leading
+    c.drawText(t)
+    return y
+
+
+def _require_reportlab() -> None:
+    if not HAS_REPORTLAB:
+        raise RuntimeError("reportlab not installed; cannot generate PDF. Install with 'pip install reportlab'.")
+
+
+def draw_formal_text(c, formal_text: str, logo_path: Optional[str] = None) -> None:
+    """Draw one message onto canvas c, starting on the current page; ends with showPage()."""
+    width, height = pagesizes.A4
+    y = height - 60
+    # Draw logo if available and a raster format
+    if logo_path and os.path.exists(logo_path):
+        try:
+            # decoded (and, for SVG, rasterized) once per logo version; see logo_cache.py
+            img = logo_cache.get_logo_reader(logo_path)
+            img_w = min(240, width * 0.4)
+            img_h = 50
+            c.drawImage(img, 40, height - img_h - 20, width=img_w, height=img_h, preserveAspectRatio=True)
+        except Exception:
+            logger.exception("Failed to draw logo on PDF")
+    # Title
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(40, y, "SWIFT ALLIANCE - MESSAGE OUTPUT")
+    y -= 30
+    draw_wrapped_text(c, formal_text, 40, y, font="Helvetica", size=10, leading=14,
+                      max_width=width - 80, bottom=60, top=height - 60)
+    c.showPage()
+
+
+def render_pdf(formal_text: str, dest, logo_path: Optional[str] = None) -> None:
+    """Render formal_text as a PDF straight into dest (a file path or writable binary stream)."""
+    _require_reportlab()
+    c = canvas.Canvas(dest, pagesize=pagesizes.A4)
+    draw_formal_text(c, formal_text, logo_path)
+    c.save()
+
+
+def render_pdf_file(formal_text: str, logo_path: Optional[str] = None, dir: Optional[str] = None):
+    """
+    Render into a temp file and return it open for reading (an io.BufferedReader, which
+    st.download_button(data=...) accepts). The file is deleted when closed.
+    """
+    return write_temp_file(lambda f: render_pdf(formal_text, f, logo_path), suffix=".pdf", dir=dir)
+
+
+def generate_pdf_bytes(formal_text: str, logo_path: Optional[str] = None) -> bytes:
+    buffer = io.BytesIO()
+    render_pdf(formal_text, buffer, logo_path)
+    return buffer.getvalue()
+
+
+# --- Batch export -----------------------------------------------------------------
+
+_POOL_LOGO: Optional[str] = None
+
+
+def _pool_init(logo_path: Optional[str]) -> None:
+    global _POOL_LOGO
+    _POOL_LOGO = logo_path
+    if logo_path and os.path.exists(logo_path):
+        try:
+            logo_cache.get_logo_reader(logo_path)  # decode the logo once per worker
+        except Exception:
+            pass
+
+
+def _pool_render(formal_text: str) -> bytes:
+    return generate_pdf_bytes(formal_text, _POOL_LOGO)
+
+
+def _bounded_map(pool, fn: Callable, items: Iterable, window: int) -> Iterator:
+    """Like pool.map, but pulls items lazily and keeps at most window tasks in flight."""
+    pending = deque()
+    for item in items:
+        if len(pending) >= window:
+            yield pending.popleft().result()
+        pending.append(pool.submit(fn, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def export_pdf_batch(texts: Iterable[str], dest, fmt: str = "zip",
+                     logo_path: Optional[str] = None,
+                     workers: Optional[int] = None,
+                     window: Optional[int] = None,
+                     progress: Optional[Callable[[int], None]] = None,
+                     name_format: str = "message_{:06d}.pdf") -> int:
+    """
+    Render many formal texts and stream them into dest (a path or a writable binary
+    file object): a ZIP with one PDF per message (fmt="zip") or one multi-document
+    PDF (fmt="pdf"). progress(n_done) is called after each message. Returns the
+    number of messages written.
+
+    workers defaults to os.cpu_count(); workers <= 1 renders in this process.
+    window bounds the renders in flight (default 4 per worker).
+    """
+    _require_reportlab()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}; expected one of {', '.join(FORMATS)}")
+    done = 0
+
+    if fmt == "pdf":
+        c = canvas.Canvas(dest, pagesize=pagesizes.A4)
+        for text in texts:
+            draw_formal_text(c, text, logo_path)
+            done += 1
+            if progress:
+                progress(done)
+        c.save()
+        return done
+
+    workers = workers or os.cpu_count() or 1
+    with zipfile.ZipFile(dest, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        if workers <= 1:
+            rendered = (generate_pdf_bytes(t, logo_path) for t in texts)
+            pool = None
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_pool_init, initargs=(logo_path,))
+            rendered = _bounded_map(pool, _pool_render, texts, window or workers * 4)
+        try:
+            for pdf in rendered:
+                zf.writestr(name_format.format(done + 1), pdf)
+                done += 1
+                if progress:
+                    progress(done)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    return done
+
+
+# --- CLI ------------------------------------------------------------------------
+
+def iter_formal_texts(source: str) -> Iterator[str]:
+    """Yield formal texts from a directory of .txt files or a JSON Lines file ("-" = stdin)."""
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            if name.lower().endswith(".txt"):
+                with open(os.path.join(source, name), "r", encoding="utf-8") as f:
+                    yield f.read()
+        return
+    f = sys.stdin if source == "-" else open(source, "r", encoding="utf-8")
+    try:
+        for n, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record: Dict[str, Any] = json.loads(line)
+            if "text" in record:
+                yield record["text"]
+            else:
+                try:
+                    yield build_formal_output(
+                        record["message_type"], record["message_body"], record.get("sender_info") or {},
+                        record.get("start_ts", ""), record.get("end_ts", ""), record.get("account_number", ""))
+                except KeyError as e:
+                    raise ValueError(f"{source}: line {n} has neither 'text' nor {e}") from None
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Batch export formal message texts to PDF")
+    parser.add_argument("source", help="JSON Lines file ('-' for stdin) or directory of .txt files")
+    parser.add_argument("--out", required=True, help="Output .zip or .pdf")
+    parser.add_argument("--format", choices=FORMATS,
+                        help="zip = one PDF per message, pdf = one combined PDF (default: from --out)")
+    parser.add_argument("--logo", help="Logo image (png/jpg/svg) drawn on every message")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Render processes for zip output (default: CPU count; 1 = in-process)")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or ("pdf" if args.out.lower().endswith(".pdf") else "zip")
+
+    def report(n):
+        if n % 100 == 0:
+            print(f"  {n} messages", file=sys.stderr)
+
+    tmp = args.out + ".tmp"
+    try:
+        with open(tmp, "wb") as out:
+            count = export_pdf_batch(iter_formal_texts(args.source), out, fmt=fmt, logo_path=args.logo,
+                                     workers=args.workers, progress=report)
+        os.replace(tmp, args.out)
+    except (OSError, ValueError, RuntimeError) as e:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        print(f"Export failed: {e}", file=sys.stderr)
+        return 1
+    print(f"Wrote {count} message(s) to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,224 @@
+"""
+status_tracker.py
+
+Background status tracking for submitted messages.
+
+Instead of one GET per message whenever someone clicks "Refresh Status", a
+StatusTracker keeps the set of in-flight message IDs and polls the ones that are
+due in batches. Each message backs off exponentially (with jitter, so a burst of
+submissions does not keep polling in lockstep) until it reaches a terminal state
+(SENT, ACKED or NACKED); then it is dropped from the set.
+
+Usage:
+  tracker = StatusTracker(gateway_status_fetcher(client, token=lambda: current_token()),
+                          on_update=lambda mid, state, status: ...)
+  tracker.start()
+  tracker.track(message_id)
+  tracker.latest(message_id)          # last known {"message_id", "state", ...}
+  tracker.updates.get()               # or consume (message_id, state, status) from the queue
+
+Functions:
+  - gateway_status_fetcher(client, token=None, batch_path="/messages/status") -> fetch(ids)
+  - StatusTracker(fetch, batch_size=50, initial_delay=1.0, max_delay=30.0, ...)
+
+Notes:
+ - fetch(ids) returns {message_id: status dict}; IDs missing from the answer, or a
+   failed fetch, are simply retried later with a longer delay.
+ - gateway_status_fetcher uses GET <batch_path>?ids=a,b,c and falls back to one
+   GET /messages/<id>/status per ID if the gateway answers 404/405.
+ - The polling thread only runs while something is in flight: it exits once the
+   last tracked message is finished and track() starts a new one, so idle
+   trackers (e.g. of ended Streamlit sessions) hold no thread.
+ - Works the same against the local stub gateway (gateway_stub.py), for demo
+   mode and load tests (python benchmarks.py status).
+"""
+import heapq
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+logger = logging.getLogger("status_tracker")
+
+TERMINAL_STATES = frozenset({"SENT", "ACKED", "NACKED"})
+
+Status = Dict[str, Any]
+Fetch = Callable[[List[str]], Dict[str, Status]]
+
+
+def gateway_status_fetcher(client, token=None, batch_path: str = "/messages/status") -> Fetch:
+    """Build a fetch(ids) for StatusTracker on top of a GatewayClient. token: str or callable."""
+    state = {"batched": True}
+
+    def current_token():
+        return token() if callable(token) else token
+
+    def fetch(ids: List[str]) -> Dict[str, Status]:
+        if state["batched"]:
+            try:
+                res = client.get(batch_path, token=current_token(), params={"ids": ",".join(ids)})
+                return {s["message_id"]: s for s in res.get("statuses", []) if s.get("message_id")}
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code not in (404, 405):
+                    raise
+                state["batched"] = False  # no batch endpoint; poll one by one
+        results = {}
+        for mid in ids:
+            results[mid] = client.get(f"/messages/{mid}/status", token=current_token())
+        return results
+
+    return fetch
+
+
+class _Tracked:
+    __slots__ = ("delay", "due", "status")
+
+    def __init__(self, delay: float, due: float):
+        self.delay = delay
+        self.due = due
+        self.status: Optional[Status] = None
+
+
+class StatusTracker:
+    def __init__(self, fetch: Fetch, batch_size: int = 50,
+                 initial_delay: float = 1.0, max_delay: float = 30.0,
+                 backoff: float = 2.0, jitter: float = 0.2,
+                 terminal_states: Iterable[str] = TERMINAL_STATES,
+                 on_update: Optional[Callable[[str, str, Status], None]] = None,
+                 use_queue: bool = True, keep_finished: int = 10000):
+        self.fetch = fetch
+        self.batch_size = batch_size
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.jitter = jitter
+        self.terminal_states = frozenset(terminal_states)
+        self.on_update = on_update
+        # (message_id, state, status) per state change; None if use_queue=False
+        self.updates: "Optional[queue.Queue[Tuple[str, str, Status]]]" = queue.Queue() if use_queue else None
+        self.polls = 0  # fetch() calls, for load tests
+        self._keep_finished = keep_finished
+        self._cond = threading.Condition()
+        self._tracked: Dict[str, _Tracked] = {}
+        self._finished: Dict[str, Status] = {}
+        self._heap: List[Tuple[float, str]] = []
+        self._thread: Optional[threading.Thread] = None
+        self._started = False
+        self._stopped = False
+
+    # --- public API --------------------------------------------------------------
+    def track(self, message_id: str) -> None:
+        """Start polling message_id (no-op if it is already tracked or finished)."""
+        with self._cond:
+            if message_id in self._tracked or message_id in self._finished:
+                return
+            due = time.monotonic() + self._jittered(self.initial_delay)
+            self._tracked[message_id] = _Tracked(self.initial_delay, due)
+            heapq.heappush(self._heap, (due, message_id))
+            self._cond.notify()
+            self._ensure_thread()
+
+    def latest(self, message_id: str) -> Optional[Status]:
+        """Last status seen for message_id (None if not polled yet)."""
+        with self._cond:
+            if message_id in self._finished:
+                return self._finished[message_id]
+            tracked = self._tracked.get(message_id)
+            return tracked.status if tracked else None
+
+    def in_flight(self) -> int:
+        with self._cond:
+            return len(self._tracked)
+
+    def start(self) -> "StatusTracker":
+        with self._cond:
+            self._started = True
+            self._ensure_thread()
+        return self
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+            thread = self._thread
+        if thread is not None:
+            thread.join()
+
+    # --- polling loop ---------------------------------------------------------------
+    def _ensure_thread(self) -> None:
+        """Start the polling thread if there is work and none is running; caller holds the lock."""
+        if self._started and not self._stopped and self._thread is None and self._tracked:
+            self._thread = threading.Thread(target=self._run, name="status-tracker", daemon=True)
+            self._thread.start()
+
+    def _jittered(self, delay: float) -> float:
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _due_batch(self) -> Optional[List[str]]:
+        """Wait until something is due; return up to batch_size due IDs (None = exit thread)."""
+        with self._cond:
+            while not self._stopped:
+                if not self._tracked:
+                    # nothing in flight: let the thread end; track() starts a new one
+                    self._heap.clear()
+                    self._thread = None
+                    return None
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    batch: List[str] = []
+                    while self._heap and self._heap[0][0] <= now and len(batch) < self.batch_size:
+                        due, mid = heapq.heappop(self._heap)
+                        tracked = self._tracked.get(mid)
+                        if tracked is not None and tracked.due == due:  # skip stale heap entries
+                            batch.append(mid)
+                    if batch:
+                        return batch
+                    continue
+                self._cond.wait(self._heap[0][0] - now if self._heap else None)
+            return None
+
+    def _run(self) -> None:
+        while True:
+            batch = self._due_batch()
+            if batch is None:
+                return
+            self.polls += 1
+            try:
+                results = self.fetch(batch)
+            except Exception as e:
+                logger.warning("Status poll for %d message(s) failed: %s", len(batch), e)
+                results = {}
+            events = []
+            with self._cond:
+                now = time.monotonic()
+                for mid in batch:
+                    tracked = self._tracked.get(mid)
+                    if tracked is None:
+                        continue
+                    status = results.get(mid)
+                    if status is not None:
+                        changed = tracked.status is None or tracked.status.get("state") != status.get("state")
+                        tracked.status = status
+                        if changed:
+                            events.append((mid, status.get("state"), status))
+                        if status.get("state") in self.terminal_states:
+                            del self._tracked[mid]
+                            self._finished[mid] = status
+                            if len(self._finished) > self._keep_finished:
+                                self._finished.pop(next(iter(self._finished)))
+                            continue
+                    tracked.delay = min(self.max_delay, tracked.delay * self.backoff)
+                    tracked.due = now + self._jittered(tracked.delay)
+                    heapq.heappush(self._heap, (tracked.due, mid))
+            for mid, state, status in events:
+                if self.updates is not None:
+                    self.updates.put((mid, state, status))
+                if self.on_update:
+                    try:
+                        self.on_update(mid, state, status)
+                    except Exception:
+                        logger.exception("status on_update callback failed")
@@ -26,19 +26,26 @@ import time
 import io
 import json
 import uuid
+import hashlib
 import logging
 import datetime
 from decimal import Decimal
 from typing import Optional, Dict, Any
 
-import streamlit as st
 import requests
+import streamlit as st
+
+from gateway_client import GatewayClient
+from gateway_stub import StubGateway
+from status_tracker import StatusTracker, gateway_status_fetcher
+from token_manager import TokenManager
 
 # Optional libs for PDF generation
 try:
     from reportlab.lib.pagesizes import A4
     from reportlab.lib.utils import ImageReader
     from reportlab.pdfgen import canvas
+    from pdf_export import draw_wrapped_text  # shared font-metric line wrapping
     HAS_REPORTLAB = True
 except Exception:
     HAS_REPORTLAB = False
@@ -68,31 +75,41 @@ st.markdown(f"""
 """, unsafe_allow_html=True)
 
 # --- Auth helpers ---------------------------------------------------------------
+# One pooled, keep-alive session per service, shared across reruns and sessions
+# (see gateway_client.py for pool size, retries and timeouts)
+@st.cache_resource
+def _gateway(base_url: str, api_key: Optional[str] = None) -> GatewayClient:
+    return GatewayClient(base_url, api_key=api_key)
+
+def _signed_out_on_401(call):
+    """Run call(); if the gateway rejects the token (401), drop it and sign out."""
+    try:
+        return call()
+    except requests.HTTPError as e:
+        if e.response is not None and e.response.status_code == 401:
+            sign_out()
+        raise
+
 def api_post(path: str, token: Optional[str]=None, data=None, files=None, timeout=30):
-    url = BASE_URL.rstrip("/") + "/" + path.lstrip("/")
-    headers = {}
-    if API_KEY:
-        headers["X-API-Key"] = API_KEY
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-    resp = requests.post(url, headers=headers, json=data, files=files, timeout=timeout)
-    resp.raise_for_status()
-    return resp.json()
+    return _signed_out_on_401(lambda: _gateway(BASE_URL, API_KEY).post_json(path, token=token, data=data, files=files, timeout=timeout))
 
 def api_get(path: str, token: Optional[str]=None, params=None, timeout=30):
-    url = BASE_URL.rstrip("/") + "/" + path.lstrip("/")
-    headers = {}
-    if API_KEY:
-        headers["X-API-Key"] = API_KEY
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-    resp = requests.get(url, headers=headers, params=params, timeout=timeout)
-    resp.raise_for_status()
-    # try JSON, else return raw bytes
-    try:
-        return resp.json()
-    except Exception:
-        return resp.content
+    return _signed_out_on_401(lambda: _gateway(BASE_URL, API_KEY).get(path, token=token, params=params, timeout=timeout))
+
+def api_download(path: str, token: Optional[str]=None, params=None, timeout=60):
+    """Stream a document into a temp file; returns (file at offset 0, content type). Close it."""
+    return _signed_out_on_401(lambda: _gateway(BASE_URL, API_KEY).download(path, token=token, params=params, timeout=timeout))
+
+# Tokens are cached per (user, client_id) and renewed in the background shortly
+# before they expire, so API calls do not wait on the auth service. Keys unused for
+# 30 minutes are evicted together with the credentials their renewal needs.
+@st.cache_resource
+def _tokens() -> TokenManager:
+    return TokenManager()
+
+@st.cache_resource
+def _key_salt() -> bytes:
+    return os.urandom(16)
 
 def auth_login(username: str, password: str) -> Optional[str]:
     """
@@ -101,18 +118,67 @@ def auth_login(username: str, password: str) -> Optional[str]:
     if DEMO_MODE:
         # demo token (not secure) — in real deployment use real Auth endpoint
         return f"demo-token-{username}"
+    payload = {"username": username, "password": password, "client_id": CLIENT_ID, "client_secret": CLIENT_SECRET}
+
+    def fetch():
+        return _gateway(AUTH_URL).post_json("/auth/login", data=payload, timeout=10)
+
+    # the key covers the password too, so a cached token is only handed to someone
+    # who entered the same credentials (salted per process, never stored)
+    digest = hashlib.sha256(_key_salt() + password.encode("utf-8")).hexdigest()
+    key = (username, CLIENT_ID, digest)
     try:
-        url = AUTH_URL.rstrip("/") + "/auth/login"
-        payload = {"username": username, "password": password, "client_id": CLIENT_ID, "client_secret": CLIENT_SECRET}
-        r = requests.post(url, json=payload, timeout=10)
-        r.raise_for_status()
-        data = r.json()
-        return data.get("access_token") or data.get("token")
+        # renewal repeats the login with the same credentials (held in memory only)
+        token = _tokens().login(key, fetch)
+        st.session_state["auth_key"] = key
+        return token
     except Exception as e:
+        _tokens().invalidate(key)
         st.error(f"Auth error: {e}")
         logger.exception("Auth login failed")
         return None
 
+def sign_out() -> None:
+    """Forget this session's token, here and in the shared token cache."""
+    key = st.session_state.pop("auth_key", None)
+    if key is not None:
+        _tokens().invalidate(key)
+    st.session_state["auth_token"] = None
+
+def current_token() -> Optional[str]:
+    """Bearer token for the logged-in user (cached; refreshed in the background)."""
+    if DEMO_MODE:
+        return st.session_state.get("auth_token")
+    key = st.session_state.get("auth_key")
+    return (_tokens().get(key) if key else None) or st.session_state.get("auth_token")
+
+# --- Status tracking --------------------------------------------------------------
+# Demo mode talks to an in-process stub gateway, so the same submit / status code
+# paths run without real services (see gateway_stub.py)
+@st.cache_resource
+def _demo_stub() -> StubGateway:
+    return StubGateway().start()
+
+def _messages_gateway() -> GatewayClient:
+    return _gateway(_demo_stub().url) if DEMO_MODE else _gateway(BASE_URL, API_KEY)
+
+def status_tracker() -> StatusTracker:
+    """
+    This session's tracker: polls its submitted messages in batches, with backoff.
+    Its thread exits once nothing is in flight, so ended sessions leave no poller.
+    """
+    key = st.session_state.get("auth_key")
+    tracker = st.session_state.get("status_tracker")
+    if tracker is None or st.session_state.get("status_tracker_key") != key:
+        if tracker is not None:
+            tracker.stop()  # logged in as someone else
+        # the polling thread cannot read st.session_state, so capture the token source here
+        token = (lambda: _tokens().get(key)) if key else st.session_state.get("auth_token")
+        tracker = StatusTracker(gateway_status_fetcher(_messages_gateway(), token=token), use_queue=False).start()
+        st.session_state["status_tracker"] = tracker
+        st.session_state["status_tracker_key"] = key
+    return tracker
+
 # --- PDF helper (local fallback) ------------------------------------------------
 def build_formal_text(message_type: str, message_body: str, sender_info: Dict[str,str], start_ts: str, end_ts: str, account_number: str) -> str:
     parts = [
@@ -156,13 +222,8 @@ def generate_pdf_bytes(formal_text: str, logo_path: Optional[str] = None) -> byt
     c.setFont("Helvetica-Bold", 12)
     c.drawString(40, y, "SWIFT ALLIANCE - MESSAGE OUTPUT")
     y -= 24
-    c.setFont("Helvetica", 9)
-    for line in formal_text.splitlines():
-        if y < 60:
-            c.showPage()
-            y = height - 60
-        c.drawString(40, y, line[:120])
-        y -= 12
+    draw_wrapped_text(c, formal_text, 40, y, font="Helvetica", size=9, leading=12,
+                      max_width=width - 80, bottom=60, top=height - 60)
     c.showPage()
     c.save()
     buffer.seek(0)
@@ -305,18 +366,25 @@ if st.button("Compose & Submit"):
         }
     }
     if DEMO_MODE:
-        # Demo flow: create local "message id", pretend to queue
-        mid = f"demo-{uuid.uuid4().hex[:8]}"
-        st.session_state["last_message_id"] = mid
-        st.session_state["last_message_body"] = message_body
-        st.session_state["last_formal"] = build_formal_text(msg_type, message_body, payload["sender"], start_ts, datetime.datetime.utcnow().isoformat(), selected_account or "")
-        st.success(f"Message created (demo) id={mid}")
+        # Demo flow: queue the message on the local stub gateway
+        try:
+            res = _messages_gateway().post_json("/messages/create", data=payload)
+            mid = res["message_id"]
+            st.session_state["last_message_id"] = mid
+            st.session_state["last_message_body"] = message_body
+            st.session_state["last_formal"] = build_formal_text(msg_type, message_body, payload["sender"], start_ts, datetime.datetime.utcnow().isoformat(), selected_account or "")
+            status_tracker().track(mid)
+            st.success(f"Message created (demo) id={mid}")
+        except Exception as e:
+            st.error(f"Failed to submit message (demo): {e}")
+            logger.exception("demo submit failed")
     else:
         try:
-            token = st.session_state.get("auth_token")
+            token = current_token()
             res = api_post("/messages/create", token=token, data=payload)
             mid = res.get("message_id") or res.get("id")
             st.session_state["last_message_id"] = mid
+            status_tracker().track(mid)
             st.success(f"Message submitted, id={mid}")
         except Exception as e:
             st.error(f"Failed to submit message: {e}")
@@ -328,17 +396,15 @@ if mid:
     st.markdown("---")
     st.subheader(f"Message ID: {mid}")
     if st.button("Refresh Status"):
-        if DEMO_MODE:
-            st.info("Demo: status=QUEUED -> SENT")
-            st.session_state["last_status"] = "SENT"
+        # the tracker polls in the background; this only reads its latest result
+        tracker = status_tracker()
+        tracker.track(mid)
+        status = tracker.latest(mid)
+        if status is None:
+            st.info("Status not polled yet; try again in a moment.")
         else:
-            try:
-                token = st.session_state.get("auth_token")
-                status = api_get(f"/messages/{mid}/status", token=token)
-                st.session_state["last_status"] = status.get("state")
-                st.write(status)
-            except Exception as e:
-                st.error(f"Status check failed: {e}")
+            st.session_state["last_status"] = status.get("state")
+            st.write(status)
     last_status = st.session_state.get("last_status", "UNKNOWN")
     st.write("Status:", last_status)
 
@@ -348,15 +414,11 @@ if mid:
             st.download_button("Download TXT", data=txt.encode("utf-8"), file_name=f"swift_msg_{mid}.txt", mime="text/plain")
         else:
             try:
-                token = st.session_state.get("auth_token")
-                data = api_get(f"/messages/{mid}/download", token=token)
-                # server should return bytes or base64; handle bytes
-                if isinstance(data, (bytes, bytearray)):
-                    st.download_button("Download TXT", data=data, file_name=f"swift_msg_{mid}.txt", mime="text/plain")
-                else:
-                    # expect JSON with 'txt' or 'pdf' base64
-                    txt = data.get("txt") or data.get("content")
-                    st.download_button("Download TXT", data=txt.encode("utf-8"), file_name=f"swift_msg_{mid}.txt", mime="text/plain")
+                token = current_token()
+                # streamed to a temp file; JSON {"txt"/"content": ...} bodies are unpacked too
+                txt_file, _ = api_download(f"/messages/{mid}/download", token=token)
+                with txt_file:  # the button copies the data; the temp file goes on close
+                    st.download_button("Download TXT", data=txt_file, file_name=f"swift_msg_{mid}.txt", mime="text/plain")
             except Exception as e:
                 st.error(f"Download failed: {e}")
 
@@ -370,18 +432,11 @@ if mid:
                 st.error("PDF generation failed. Ensure reportlab is installed.")
         else:
             try:
-                token = st.session_state.get("auth_token")
-                pdf_data = api_get(f"/messages/{mid}/download?format=pdf", token=token)
-                # if bytes:
-                if isinstance(pdf_data, (bytes, bytearray)):
-                    st.download_button("Download PDF", data=pdf_data, file_name=f"swift_msg_{mid}.pdf", mime="application/pdf")
-                else:
-                    # maybe base64 in JSON
-                    b64 = pdf_data.get("pdf_b64")
-                    if b64:
-                        import base64
-                        raw = base64.b64decode(b64)
-                        st.download_button("Download PDF", data=raw, file_name=f"swift_msg_{mid}.pdf", mime="application/pdf")
+                token = current_token()
+                # streamed to a temp file; JSON {"pdf_b64": ...} bodies are decoded chunk by chunk
+                pdf_file, _ = api_download(f"/messages/{mid}/download", token=token, params={"format": "pdf"})
+                with pdf_file:
+                    st.download_button("Download PDF", data=pdf_file, file_name=f"swift_msg_{mid}.pdf", mime="application/pdf")
             except Exception as e:
                 st.error(f"PDF download failed: {e}")
 
@@ -12,11 +12,13 @@ from swift_alliance import validate_pain001_generated, validate_mt103_text, Sche
 import tempfile
 import smtplib
 
-try:
-    import paramiko
-    HAS_PARAMIKO = True
-except Exception:
-    HAS_PARAMIKO = False
+from optional_deps import optional
+
+# imported when an SFTP upload is first attempted, not at startup
+paramiko = optional("paramiko")
+HAS_PARAMIKO = paramiko
+# schema cache helpers; loaded (with xmlschema / lxml) on first validation
+swift_iso_validator = optional("swift_iso_validator")
 
 ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
 DEFAULT_LOGO_PATH = os.path.join(ASSETS_DIR, "swift_logo.svg")
@@ -29,6 +31,8 @@ class SwiftGUI(QtWidgets.QMainWindow):
         self.resize(980, 700)
         self.schema_path = None
         self.last_validation_result = {"valid": False, "errors": []}
+        # (xml_text, parsed tree) of the last generated pain.001, reused by "Validate Now"
+        self._last_generated_xml = None
         self._build_ui()
 
     def _build_ui(self):
@@ -205,10 +209,11 @@ class SwiftGUI(QtWidgets.QMainWindow):
                 self._set_validation_result(valid, issues)
                 self.status.showMessage("MT103 preview generated and validated", 5000)
             else:
-                xml = generate_pain001(payment)
+                xml, tree = generate_pain001(payment, return_tree=True)
+                self._last_generated_xml = (xml, tree)
                 self.preview.setPlainText(xml)
                 if self.schema_path:
-                    valid, errors = validate_pain001_generated(xml, self.schema_path)
+                    valid, errors = validate_pain001_generated(xml, self.schema_path, tree=tree, max_errors=swift_iso_validator.DEFAULT_ERROR_BUDGET)
                     self._set_validation_result(valid, errors or [])
                     if valid:
                         self.status.showMessage("XML preview generated and validated (OK)", 5000)
@@ -234,10 +239,15 @@ class SwiftGUI(QtWidgets.QMainWindow):
             if not self.schema_path:
                 QtWidgets.QMessageBox.warning(self, "Schema required", "Please select a pain.001 XSD to validate XML.")
                 return
+            # the generator's tree is only valid while the preview text is unchanged
+            tree = None
+            if self._last_generated_xml and self._last_generated_xml[0] == content:
+                tree = self._last_generated_xml[1]
             try:
-                valid, errors = validate_pain001_generated(content, self.schema_path)
+                valid, errors = validate_pain001_generated(content, self.schema_path, tree=tree, max_errors=swift_iso_validator.DEFAULT_ERROR_BUDGET)
                 self._set_validation_result(valid, errors or [])
-                self.status.showMessage("ISO20022 validation completed", 5000)
+                sc = swift_iso_validator.schema_cache_stats()
+                self.status.showMessage(f"ISO20022 validation completed (schema cache: {sc['hits']} hits / {sc['misses']} misses)", 5000)
             except SchemaNotFoundError as e:
                 QtWidgets.QMessageBox.critical(self, "Schema error", str(e))
 
@@ -250,12 +260,14 @@ class SwiftGUI(QtWidgets.QMainWindow):
         else:
             self.validation_status_label.setText("Validation status: INVALID")
             self.validation_status_label.setStyleSheet("color: red; font-weight: bold;")
-            text = ""
             if not errors:
                 text = "Unknown validation failure."
             else:
-                for i, e in enumerate(errors, 1):
-                    text += f"{i}. {e}\n"
+                # callers pass a bounded list; cap again so MT/other sources can't flood the widget
+                shown = errors[:swift_iso_validator.DEFAULT_ERROR_BUDGET + 1]
+                text = "\n".join(f"{i}. {e}" for i, e in enumerate(shown, 1))
+                if len(errors) > len(shown):
+                    text += f"\n... {len(errors) - len(shown)} more issues not shown"
             self.validation_list.setPlainText(text)
 
     def on_save(self):
@@ -370,6 +382,8 @@ class SwiftGUI(QtWidgets.QMainWindow):
     def select_schema_file(self):
         fname, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Select pain.001 XSD", "", "XSD files (*.xsd);;All Files (*)")
         if fname:
+            # re-selecting a file forces a fresh parse (e.g. after editing the XSD in place)
+            swift_iso_validator.invalidate_schema_cache(fname)
             self.schema_path = fname
             self.schema_label.setText(os.path.basename(fname))
             self.status.showMessage(f"Schema set: {fname}", 5000)
@@ -12,14 +12,10 @@ Notes:
  - Do NOT embed production SWIFT credentials here. Use st.secrets for real credentials.
 """
 import os
-import io
-import json
 import time
 import uuid
 import shutil
 import logging
-import hashlib
-import requests
 import datetime
 import random
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
@@ -28,42 +24,37 @@ from typing import Dict, List, Optional, Tuple
 import streamlit as st
 import xml.etree.ElementTree as ET
 
-# Optional libs
-try:
-    import xmlschema
-    HAS_XMLSCHEMA = True
-except Exception:
-    xmlschema = None
-    HAS_XMLSCHEMA = False
-
-try:
-    import paramiko
-    HAS_PARAMIKO = True
-except Exception:
-    HAS_PARAMIKO = False
-
-# PDF libs
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.lib.utils import ImageReader
-    from reportlab.pdfgen import canvas
-    HAS_REPORTLAB = True
-except Exception:
-    HAS_REPORTLAB = False
+from swift_messages import serialize_xml, qualify_tree
+import bank_store
+import user_store
+from pdf_export import build_formal_output, render_pdf_file
+from optional_deps import optional
+# config.json is read through config_manager's memoized loader and written atomically
+from config_manager import save_config, get_setting
+
+# Optional libs. Imported on first use (validation, SFTP, PDF, logo conversion)
+# rather than at startup; each HAS_* flag is the lazy module itself and is truthy
+# only if the import succeeds. See optional_deps.py.
+xmlschema = optional("xmlschema")
+HAS_XMLSCHEMA = xmlschema
+
+# Shared validator (its compiled-schema cache lives for the whole server process,
+# so it survives Streamlit reruns)
+swift_iso_validator = optional("swift_iso_validator")
+HAS_VALIDATOR = swift_iso_validator
+
+paramiko = optional("paramiko")
+HAS_PARAMIKO = paramiko
+
+# PDF libs (used through pdf_export.py)
+HAS_REPORTLAB = optional("reportlab.pdfgen.canvas")
 
 # Pillow for image handling
-try:
-    from PIL import Image
-    HAS_PIL = True
-except Exception:
-    HAS_PIL = False
+HAS_PIL = optional("PIL.Image")
 
 # cairosvg for SVG -> PNG conversion
-try:
-    import cairosvg
-    HAS_CAIROSVG = True
-except Exception:
-    HAS_CAIROSVG = False
+cairosvg = optional("cairosvg")
+HAS_CAIROSVG = cairosvg
 
 # Logging
 logging.basicConfig(level=logging.INFO)
@@ -72,82 +63,40 @@ logger = logging.getLogger("swift_alliance_streamlit")
 # --- Paths / storage -------------------------------------------------------------
 ROOT_DIR = os.path.dirname(__file__)
 DATA_FILE = os.path.join(ROOT_DIR, "bank_data.json")
+DB_FILE = os.path.join(ROOT_DIR, "bank_data.db")
 ASSETS_DIR = os.path.join(ROOT_DIR, "assets")
 os.makedirs(ASSETS_DIR, exist_ok=True)
 SCHEMAS_DIR = os.path.join(ASSETS_DIR, "schemas")
 os.makedirs(SCHEMAS_DIR, exist_ok=True)
 USERS_FILE = os.path.join(ROOT_DIR, "users.json")
-CONFIG_FILE = os.path.join(ROOT_DIR, "config.json")
 
 # --- Helpers --------------------------------------------------------------------
 
-def save_config(data: Dict):
-    cfg = {}
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                cfg = json.load(f)
-        except Exception:
-            cfg = {}
-    cfg.update(data)
-    with open(CONFIG_FILE, "w", encoding="utf-8") as f:
-        json.dump(cfg, f, indent=2)
-
-def load_config() -> Dict:
-    if os.path.exists(CONFIG_FILE):
-        try:
-            with open(CONFIG_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except Exception:
-            return {}
-    return {}
-
-# Password hashing
-def hash_password(password: str) -> str:
-    salt = "swift_alliance_app_salt_2025"
-    return hashlib.sha256((password + salt).encode()).hexdigest()
-
-# Ensure default admin user
+# Users (user_store.py keeps a username index in memory, reloaded only when
+# users.json changes on disk, and writes the file atomically)
 def ensure_default_user():
-    if not os.path.exists(USERS_FILE):
-        admin = {"username": "admin", "password": hash_password("admin")}
-        with open(USERS_FILE, "w", encoding="utf-8") as f:
-            json.dump({"users": [admin]}, f, indent=2)
+    user_store.get_directory(USERS_FILE).ensure_user("admin", "admin")
 ensure_default_user()
 
 def validate_user(username: str, password: str) -> bool:
-    if not os.path.exists(USERS_FILE):
-        return False
-    with open(USERS_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    for u in data.get("users", []):
-        if u.get("username") == username and u.get("password") == hash_password(password):
-            return True
-    return False
-
-def add_user(username: str, password: str):
-    data = {"users": []}
-    if os.path.exists(USERS_FILE):
-        with open(USERS_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-    data.setdefault("users", []).append({"username": username, "password": hash_password(password)})
-    with open(USERS_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
-
-# Simple bank persistence
+    return user_store.get_directory(USERS_FILE).verify(username, password)
+
+def add_user(username: str, password: str) -> bool:
+    """Register a new user; returns False if the username is already taken."""
+    return user_store.get_directory(USERS_FILE).add(username, password) != "skipped"
+
+# Bank persistence (SQLite, see bank_store.py; bank_data.json is migrated on first use).
+# The store and its read cache live across reruns, so this is cheap per interaction.
 def load_bank_data():
-    if os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return {"customers": [], "accounts": [], "transactions": {}}
+    return bank_store.get_store(DB_FILE, json_path=DATA_FILE).load()
 
 def save_bank_data(data):
-    with open(DATA_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2)
+    bank_store.get_store(DB_FILE, json_path=DATA_FILE).save(data)
 
 BANK = load_bank_data()
 
 def create_demo_customer_and_accounts():
+    global BANK
     if BANK.get("customers"):
         return
     cust_id = "CUST" + datetime.datetime.now().strftime("%Y%m%d") + "1001"
@@ -163,7 +112,6 @@ def create_demo_customer_and_accounts():
         "id_type": "Company",
         "created_date": datetime.date.today().isoformat()
     }
-    BANK["customers"].append(customer)
     acct1 = {
         "account_number": "CH970020620625170160K",
         "customer_id": cust_id,
@@ -178,8 +126,11 @@ def create_demo_customer_and_accounts():
         "currency": "CHF",
         "balance": "50000.00"
     }
-    BANK["accounts"].extend([acct1, acct2])
-    save_bank_data(BANK)
+    store = bank_store.get_store(DB_FILE, json_path=DATA_FILE)
+    store.upsert_customer(customer)
+    store.upsert_account(acct1)
+    store.upsert_account(acct2)
+    BANK = load_bank_data()
 
 # --- SWIFT templates ------------------------------------------------------------
 SWIFT_SENDER_INFO_DEFAULT = {
@@ -219,7 +170,7 @@ def build_mt_message(msg_type: str, fields: Dict[str, str], sender_info: Dict[st
 def format_decimal(value: Decimal) -> str:
     return format(value.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP), 'f')
 
-def generate_pain001_xml(payment: Dict) -> str:
+def generate_pain001_xml(payment: Dict, compact: bool = False, return_tree: bool = False):
     NS = 'urn:iso:std:iso:20022:tech:xsd:pain.001.001.03'
     CstmrCdtTrfInitn = ET.Element('CstmrCdtTrfInitn', xmlns=NS)
     GrpHdr = ET.SubElement(CstmrCdtTrfInitn, 'GrpHdr')
@@ -251,10 +202,10 @@ def generate_pain001_xml(payment: Dict) -> str:
     if payment.get('remittance_info'):
         RmtInf = ET.SubElement(CdtTrfTxInf, 'RmtInf')
         ET.SubElement(RmtInf, 'Ustrd').text = payment.get('remittance_info')
-    xml_bytes = ET.tostring(CstmrCdtTrfInitn, encoding='utf-8')
-    import xml.dom.minidom
-    dom = xml.dom.minidom.parseString(xml_bytes)
-    return dom.toprettyxml(indent="  ")
+    xml_text = serialize_xml(CstmrCdtTrfInitn, compact=compact)
+    if return_tree:
+        return xml_text, qualify_tree(CstmrCdtTrfInitn)
+    return xml_text
 
 # --- Logo download & conversion --------------------------------------------------
 def _choose_extension(url: str, content_type: str) -> str:
@@ -272,6 +223,7 @@ def download_logo_from_url(url: str) -> Optional[str]:
     Download logo to assets/; if SVG and cairosvg present, convert to PNG for PDF embedding.
     Returns path to image file that should be used for display and PDF.
     """
+    import requests  # only needed here; kept off the startup path
     try:
         r = requests.get(url, timeout=20)
         r.raise_for_status()
@@ -316,79 +268,8 @@ def show_dos_boot(config_sequence: List[str], line_delay: float = 0.06):
         time.sleep(line_delay)
 
 # --- PDF generation -------------------------------------------------------------
-def build_formal_output(message_type: str, message_body: str, sender_info: Dict[str,str], start_ts: str, end_ts: str, account_number: str) -> str:
-    header_lines = [
-        "INSTANT TYPE AND TRANSMISSION: INSTANT",
-        "",
-        "MESSAGE HEADER",
-        f"Message Type: {message_type}",
-        f"Reference: {datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')}",
-        f"Sender BIC: {sender_info.get('bic','')}",
-        f"Sender Bank: {sender_info.get('bank_name','')}",
-        f"Sender Address: {sender_info.get('bank_address','')}",
-        f"Account Name: {sender_info.get('account_name','')}",
-        f"Account IBAN: {sender_info.get('account_iban','')}",
-        f"Selected Account (from system): {account_number}",
-        "",
-        "MESSAGE TEXT",
-        message_body,
-        "",
-        "MESSAGE HAS BEEN TRANSMITTED SUCCESSFULLY",
-        "CONFIRMED & RECEIVED",
-        "",
-        f"Start Time: {start_ts}",
-        f"End Time:   {end_ts}"
-    ]
-    return "\n".join(header_lines)
-
-def generate_pdf_bytes(formal_text: str, logo_path: Optional[str]=None) -> bytes:
-    if not HAS_REPORTLAB:
-        raise RuntimeError("reportlab not installed; cannot generate PDF. Install with 'pip install reportlab'.")
-    buffer = io.BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    y = height - 60
-    # Draw logo if available and a raster format
-    if logo_path and os.path.exists(logo_path):
-        try:
-            # If SVG present and not converted, try to convert using cairosvg on the fly
-            if logo_path.lower().endswith(".svg") and HAS_CAIROSVG:
-                tmp_png = os.path.join(ASSETS_DIR, f"tmp_logo_{uuid.uuid4().hex}.png")
-                try:
-                    cairosvg.svg2png(url=logo_path, write_to=tmp_png, output_width=1024)
-                    img = ImageReader(tmp_png)
-                    os.remove(tmp_png)
-                except Exception:
-                    img = ImageReader(logo_path)  # may fail
-            else:
-                img = ImageReader(logo_path)
-            img_w = min(240, width * 0.4)
-            img_h = 50
-            c.drawImage(img, 40, height - img_h - 20, width=img_w, height=img_h, preserveAspectRatio=True)
-        except Exception:
-            logger.exception("Failed to draw logo on PDF")
-    # Title
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(40, y, "SWIFT ALLIANCE - MESSAGE OUTPUT")
-    y -= 30
-    c.setFont("Helvetica", 10)
-    lines = formal_text.splitlines()
-    for line in lines:
-        if y < 60:
-            c.showPage()
-            y = height - 60
-        max_chars = 95
-        while len(line) > max_chars:
-            piece = line[:max_chars]
-            c.drawString(40, y, piece)
-            y -= 14
-            line = line[max_chars:]
-        c.drawString(40, y, line)
-        y -= 14
-    c.showPage()
-    c.save()
-    buffer.seek(0)
-    return buffer.read()
+# build_formal_output and the PDF rendering (render_pdf_file) live in pdf_export.py,
+# shared with the batch exporter: python pdf_export.py --help
 
 # --- Styles (Oracle-like) -------------------------------------------------------
 _ORACLE_RED = "#D00000"
@@ -418,9 +299,8 @@ st.title("Swift Alliance — SWIFT Message Composer (with PDF/TXT export)")
 st.markdown('<div class="header-bar">SWIFT Alliance — Secure Composer</div>', unsafe_allow_html=True)
 
 # Load stored config logo path if present
-cfg = load_config()
-if "logo_path" in cfg and cfg["logo_path"]:
-    lp = cfg["logo_path"]
+if get_setting("logo_path"):
+    lp = get_setting("logo_path")
     if not os.path.isabs(lp):
         lp = os.path.join(ROOT_DIR, lp)
     if os.path.exists(lp):
@@ -461,8 +341,9 @@ if not st.session_state["logged_in"]:
         if st.button("Register", key="register_btn"):
             if not input_uname or not input_pwd:
                 st.error("Enter username and password")
+            elif not add_user(input_uname, input_pwd):
+                st.error("Username already exists")
             else:
-                add_user(input_uname, input_pwd)
                 st.session_state["username"] = input_uname
                 st.session_state["logged_in"] = True
                 st.success("User created and logged in")
@@ -477,6 +358,9 @@ if not st.session_state["logged_in"]:
 # After login
 uname = st.session_state.get("username", "")
 st.sidebar.markdown(f"Logged in as: **{uname}**")
+if HAS_VALIDATOR.imported:  # shown once validation has been used; checking must not import it
+    _sc = swift_iso_validator.schema_cache_stats()
+    st.sidebar.caption(f"Schema cache: {_sc['hits']} hits / {_sc['misses']} misses ({_sc['size']} loaded)")
 
 # Demo data
 create_demo_customer_and_accounts()
@@ -621,10 +505,24 @@ if compose_btn:
             "reference": reference
         }
         try:
-            message_body = generate_pain001_xml(payment)
+            message_body, message_tree = generate_pain001_xml(payment, return_tree=True)
         except Exception as e:
             st.error(f"Failed to build pain.001 XML: {e}")
             st.stop()
+        schema_path = get_setting("schema_path")
+        if schema_path and HAS_VALIDATOR:
+            if not os.path.isabs(schema_path):
+                schema_path = os.path.join(ROOT_DIR, schema_path)
+            try:
+                valid, errors = swift_iso_validator.validate_pain001_generated(
+                    message_body, schema_path, tree=message_tree,
+                    max_errors=swift_iso_validator.DEFAULT_ERROR_BUDGET)
+                if valid:
+                    st.success("pain.001 XML is valid against the configured XSD.")
+                else:
+                    st.warning("pain.001 XML validation errors:\n" + "\n".join(f"- {e}" for e in errors or []))
+            except swift_iso_validator.SchemaNotFoundError as e:
+                st.error(str(e))
 
     st.session_state["message_end_ts"] = datetime.datetime.utcnow().isoformat()
     formal_text = build_formal_output(msg_type, message_body, sender_info, st.session_state["message_start_ts"], st.session_state["message_end_ts"], selected_account or "")
@@ -642,8 +540,9 @@ if download_pdf_btn:
         formal_text_to_export = st.session_state.get("formal_text") or st.session_state.get("preview")
         st.session_state["message_end_ts"] = datetime.datetime.utcnow().isoformat()
         try:
-            pdf_bytes = generate_pdf_bytes(formal_text_to_export, st.session_state.get("logo_path"))
-            st.download_button("Download PDF", data=pdf_bytes, file_name=f"swift_message_{datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')}.pdf", mime="application/pdf")
+            # rendered into a temp file rather than an in-memory bytes copy
+            with render_pdf_file(formal_text_to_export, st.session_state.get("logo_path")) as pdf_file:
+                st.download_button("Download PDF", data=pdf_file, file_name=f"swift_message_{datetime.datetime.utcnow().strftime('%Y%m%d%H%M%S')}.pdf", mime="application/pdf")
             st.success("PDF generated (download button above).")
         except Exception as e:
             st.error(f"PDF generation failed: {e}. Install reportlab, pillow, and optionally cairosvg for SVG support.")
@@ -12,22 +12,323 @@ Usage:
 Notes:
   - This module does NOT contact any external services.
   - It relies on xmlschema for XSD validation; xmlschema supports XML Schema 1.0.
+  - Compiled schemas are kept in a process-wide cache (see get_schema /
+    invalidate_schema_cache / schema_cache_stats) so repeated validations do not
+    re-parse the XSD.
+  - precompile_schema(schema_path) writes a pickled schema next to the XSD
+    (<schema>.xsd.pkl). A fresh process loads it instead of parsing the XSD as
+    long as its fingerprint still matches; otherwise the XSD is parsed as usual.
+    Only load artifacts you produced yourself (pickle is not safe for untrusted input).
+  - Validation modes: mode="full" (default) collects every error with xmlschema's
+    detailed diagnostics; mode="first" stops after max_errors; mode="fast" only
+    answers valid/invalid (plus the first error). "first" and "fast" run on lxml
+    (libxml2) when it is installed, which is several times faster. The lxml path
+    never expands entities or loads anything over the network.
+  - max_errors caps the errors collected in any mode and fail_fast=True stops at
+    the first one; a truncated result ends with a summary line. Interactive callers
+    (GUI, CLI) use DEFAULT_ERROR_BUDGET so huge broken files return quickly.
 """
 
-from typing import Tuple, List, Optional
+from typing import Tuple, List, Optional, Dict, Any, Iterator
+from collections import OrderedDict
+import hashlib
+import itertools
+import json
+import mmap
+import os
+import pickle
+import sys
+import tempfile
+import threading
 import xmlschema
 import io
 import re
 from xml.etree import ElementTree as ET
 
+# Optional fast backend (libxml2)
+try:
+    from lxml import etree as lxml_etree
+    HAS_LXML = True
+    _LXML_SCHEMA_ERRORS: Tuple[type, ...] = (lxml_etree.XMLSchemaParseError, lxml_etree.XMLSyntaxError)
+    # Documents and XSDs may come from outside: never expand entities or fetch
+    # anything over the network (lxml < 5 resolves external entities by default).
+    _LXML_PARSER = lxml_etree.XMLParser(resolve_entities=False, no_network=True)
+
+    class _LxmlSchema(lxml_etree.XMLSchema):
+        """lxml XMLSchema plus a lock: the error_log of a cached schema is shared by all threads."""
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self.lock = threading.Lock()
+except Exception:
+    lxml_etree = None
+    HAS_LXML = False
+    _LXML_SCHEMA_ERRORS = ()
+
 # Exceptions
 class SchemaNotFoundError(FileNotFoundError):
     pass
 
-def validate_pain001_xml(xml_string: str, schema_path: str) -> Tuple[bool, Optional[List[str]]]:
+# Validation modes / backends
+MODE_FAST = "fast"    # boolean answer, first error only
+MODE_FIRST = "first"  # stop after max_errors
+MODE_FULL = "full"    # every error, detailed xmlschema diagnostics
+VALIDATION_MODES = (MODE_FAST, MODE_FIRST, MODE_FULL)
+BACKENDS = ("auto", "lxml", "xmlschema")
+DEFAULT_FIRST_ERRORS = 10
+# Bounded default for the GUI / CLI (a broken bulk file can yield 100k+ errors)
+DEFAULT_ERROR_BUDGET = 100
+
+
+# --- Compiled schema cache ---
+
+def _file_digest(path: str) -> str:
+    """SHA256 of the file content (used to detect real XSD changes)."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# --- Serialized schema artifacts (warm start) ---
+
+_ARTIFACT_MAGIC = b"SAXSD1\n"
+ARTIFACT_SUFFIX = ".pkl"
+
+
+def schema_artifact_path(schema_path: str) -> str:
+    """Default location of the precompiled artifact for an XSD (next to it)."""
+    return schema_path + ARTIFACT_SUFFIX
+
+
+def _artifact_fingerprint(digest: str) -> Dict[str, str]:
+    # A pickle is only reusable with the same XSD content, xmlschema release and
+    # Python minor version.
+    return {
+        "xsd_sha256": digest,
+        "xmlschema": getattr(xmlschema, "__version__", "unknown"),
+        "python": "%d.%d" % sys.version_info[:2],
+    }
+
+
+def precompile_schema(schema_path: str, artifact_path: Optional[str] = None) -> str:
+    """
+    Parse schema_path once and write a serialized artifact for fast warm starts.
+
+    The artifact holds a one-line JSON fingerprint header followed by the pickled
+    XMLSchema. It is written atomically (temp file + rename). Returns the artifact path.
+    """
+    try:
+        digest = _file_digest(schema_path)
+    except OSError as e:
+        raise SchemaNotFoundError(f"Schema file not found: {schema_path}") from e
+    schema = xmlschema.XMLSchema(schema_path)
+    artifact_path = artifact_path or schema_artifact_path(schema_path)
+    header = json.dumps(_artifact_fingerprint(digest), sort_keys=True).encode("utf-8")
+
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(artifact_path)), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_ARTIFACT_MAGIC)
+            f.write(header + b"\n")
+            pickle.dump(schema, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, artifact_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return artifact_path
+
+
+def load_schema_artifact(schema_path: str, digest: Optional[str] = None,
+                         artifact_path: Optional[str] = None) -> Optional["xmlschema.XMLSchema"]:
+    """
+    Return the pickled schema for schema_path if a matching artifact exists.
+
+    Returns None when there is no artifact, its fingerprint does not match the
+    current XSD content / xmlschema / Python version, or it cannot be read.
+    """
+    artifact_path = artifact_path or schema_artifact_path(schema_path)
+    if not os.path.exists(artifact_path):
+        return None
+    try:
+        if digest is None:
+            digest = _file_digest(schema_path)
+        with open(artifact_path, "rb") as f:
+            if f.readline() != _ARTIFACT_MAGIC:
+                return None
+            header = json.loads(f.readline().decode("utf-8"))
+            if header != _artifact_fingerprint(digest):
+                return None
+            schema = pickle.load(f)
+    except Exception:
+        # stale or corrupt artifact: behave as if it was not there
+        return None
+    return schema if isinstance(schema, xmlschema.XMLSchemaBase) else None
+
+
+def _compile_schema(path: str, digest: str, backend: str) -> Any:
+    if backend == "lxml":
+        return _LxmlSchema(lxml_etree.parse(path, _LXML_PARSER))
+    # Prefer a precompiled artifact; otherwise parse the XSD.
+    schema = load_schema_artifact(path, digest=digest)
+    if schema is None:
+        schema = xmlschema.XMLSchema(path)
+    return schema
+
+
+class SchemaCache:
+    """
+    Process-wide LRU registry of compiled schema objects.
+
+    Entries are keyed by the real path of the XSD and the backend ("xmlschema" or
+    "lxml"), since each backend compiles its own schema. Each lookup stats the file:
+    if (mtime, size) are unchanged the cached schema is returned; otherwise the
+    content hash is compared and the XSD is only re-parsed when the content
+    really changed. Thread-safe; parsing happens outside the lock.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, schema_path: str, backend: str = "xmlschema") -> Any:
+        real = os.path.realpath(schema_path)
+        key = (real, backend)
+        try:
+            st = os.stat(real)
+        except OSError as e:
+            raise SchemaNotFoundError(f"Schema file not found: {schema_path}") from e
+        stamp = (st.st_mtime_ns, st.st_size)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["stamp"] == stamp:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["schema"]
+
+        try:
+            digest = _file_digest(real)
+        except OSError as e:
+            raise SchemaNotFoundError(f"Schema file not found: {schema_path}") from e
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry["digest"] == digest:
+                # touched but unchanged: refresh the stamp and keep the schema
+                entry["stamp"] = stamp
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["schema"]
+
+        # Parsing may raise (xmlschema.XMLSchemaException or an lxml parse error),
+        # in which case nothing is cached.
+        schema = _compile_schema(real, digest, backend)
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = {"stamp": stamp, "digest": digest, "schema": schema}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return schema
+
+    def invalidate(self, schema_path: Optional[str] = None) -> None:
+        """Drop one schema (by path) or the whole cache when schema_path is None."""
+        with self._lock:
+            if schema_path is None:
+                self._entries.clear()
+            else:
+                real = os.path.realpath(schema_path)
+                for key in [k for k in self._entries if k[0] == real]:
+                    del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+
+_SCHEMA_CACHE = SchemaCache()
+
+
+def get_schema(schema_path: str, backend: str = "xmlschema") -> Any:
+    """
+    Return the compiled schema for schema_path from the shared cache.
+
+    backend "xmlschema" returns an xmlschema.XMLSchema, "lxml" an lxml.etree.XMLSchema.
+    Raises SchemaNotFoundError if the file is missing and xmlschema.XMLSchemaException
+    (or an lxml parse error) if the XSD cannot be parsed.
+    """
+    if backend == "lxml" and not HAS_LXML:
+        raise ValueError("lxml backend requested but lxml is not installed")
+    return _SCHEMA_CACHE.get(schema_path, backend)
+
+
+def _is_etree(source: Any) -> bool:
+    return isinstance(source, (ET.Element, ET.ElementTree))
+
+
+def _is_lxml_tree(source: Any) -> bool:
+    return HAS_LXML and isinstance(source, (lxml_etree._Element, lxml_etree._ElementTree))
+
+
+def _resolve_backend(mode: str, backend: str, source: Any = None) -> str:
+    if mode not in VALIDATION_MODES:
+        raise ValueError(f"Unknown validation mode: {mode!r} (expected one of {VALIDATION_MODES})")
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown validation backend: {backend!r} (expected one of {BACKENDS})")
+    if backend == "auto":
+        if _is_etree(source):
+            # xmlschema validates stdlib trees directly; lxml would need a re-parse
+            return "xmlschema"
+        # full diagnostics stay on xmlschema; the bounded modes take the fast path
+        return "lxml" if HAS_LXML and mode != MODE_FULL else "xmlschema"
+    return backend
+
+
+def invalidate_schema_cache(schema_path: Optional[str] = None) -> None:
+    """Forget a cached schema (or all of them) so the next call re-parses it."""
+    _SCHEMA_CACHE.invalidate(schema_path)
+
+
+def schema_cache_stats() -> Dict[str, int]:
+    """Return hit/miss counters and current size of the shared schema cache."""
+    return _SCHEMA_CACHE.stats()
+
+
+def validate_pain001_xml(xml_string: str, schema_path: str,
+                         mode: str = MODE_FULL,
+                         max_errors: Optional[int] = None,
+                         backend: str = "auto",
+                         fail_fast: bool = False) -> Tuple[bool, Optional[List[str]]]:
     """
     Validate a pain.001 XML string against the provided XSD file.
 
+    xml_string may also be bytes or an already parsed tree (xml.etree or lxml
+    element / ElementTree with namespace-qualified tags), which is validated
+    without parsing again.
+
+    mode:
+      "full"  - collect every error (xmlschema diagnostics)
+      "first" - stop after max_errors errors (default DEFAULT_FIRST_ERRORS)
+      "fast"  - valid/invalid only; at most the first error is returned
+    max_errors: error budget for any mode; None uses the mode default, 0 means unlimited.
+    fail_fast: stop at the first error (same as max_errors=1).
+    backend: "auto" (lxml for fast/first when installed, else xmlschema), "lxml" or "xmlschema".
+
+    When the budget cuts validation short, the last list entry is a summary line
+    ("Stopped after N error(s); ..."), except in "fast" mode.
+
     Returns:
       (is_valid, None) if valid
       (False, [error messages...]) if invalid
@@ -35,19 +336,82 @@ def validate_pain001_xml(xml_string: str, schema_path: str) -> Tuple[bool, Optio
     Example:
       valid, errors = validate_pain001_xml(xml_text, "schemas/pain.001.001.03.xsd")
     """
-    # Load schema
+    backend = _resolve_backend(mode, backend, xml_string)
+    if fail_fast or mode == MODE_FAST:
+        limit: Optional[int] = 1
+    elif max_errors is not None:
+        limit = max_errors if max_errors > 0 else None
+    else:
+        limit = DEFAULT_FIRST_ERRORS if mode == MODE_FIRST else None
+
+    # Load schema (compiled once per process, see SchemaCache)
     try:
-        schema = xmlschema.XMLSchema(schema_path)
+        schema = get_schema(schema_path, backend)
+    except SchemaNotFoundError:
+        raise
     except OSError as e:
         raise SchemaNotFoundError(f"Schema file not found: {schema_path}") from e
-    except xmlschema.XMLSchemaException as e:
+    except (xmlschema.XMLSchemaException,) + _LXML_SCHEMA_ERRORS as e:
         # Problem parsing XSD
         return False, [f"Failed to load schema: {e}"]
 
-    # Validate using iter_errors to gather full diagnostics
+    if backend == "lxml":
+        errors, summary = _lxml_errors(schema, xml_string, limit)
+    else:
+        errors, summary = _xmlschema_errors(schema, xml_string, limit)
+
+    if errors:
+        if summary and mode != MODE_FAST:
+            errors.append(summary)
+        return False, errors
+    return True, None
+
+
+def _lxml_document(source: Any) -> Any:
+    """Return an lxml tree for source, parsing only if it is not one already."""
+    if _is_lxml_tree(source):
+        return source
+    if _is_etree(source):
+        # only reached when backend="lxml" is forced for a stdlib tree
+        if isinstance(source, ET.ElementTree):
+            source = source.getroot()
+        source = ET.tostring(source)
+    elif isinstance(source, str):
+        # lxml refuses str input that carries an encoding declaration
+        source = source.encode('utf-8')
+    return lxml_etree.fromstring(source, _LXML_PARSER)
+
+
+def _lxml_errors(schema: Any, xml_string: Any, limit: Optional[int]) -> Tuple[List[str], Optional[str]]:
+    try:
+        doc = _lxml_document(xml_string)
+    except Exception as e:
+        return [f"Failed to parse/validate XML: {e}"], None
+    with schema.lock:
+        try:
+            if schema.validate(doc):
+                return [], None
+        except lxml_etree.XMLSchemaValidateError as e:
+            # e.g. an entity reference left unexpanded by _LXML_PARSER
+            return [f"Failed to parse/validate XML: {e}"], None
+        # libxml2 has already collected the log (error_log is a copy); only
+        # format what fits the budget
+        log = schema.error_log
+    total = len(log)
+    shown = total if limit is None else min(limit, total)
+    errors = [f"Line {err.line}, Col {err.column}: {err.message}" for err in log[:shown]]
+    summary = f"Stopped after {shown} error(s); {total - shown} more not shown" if shown < total else None
+    return errors, summary
+
+
+def _xmlschema_errors(schema: Any, xml_string: Any, limit: Optional[int]) -> Tuple[List[str], Optional[str]]:
+    # Validate using iter_errors; stop early once the budget is spent
     errors = []
     try:
         for err in schema.iter_errors(xml_string):
+            if limit is not None and len(errors) >= limit:
+                # at least one more error exists; the rest is never computed
+                return errors, f"Stopped after {limit} error(s); remaining errors not checked"
             # xmlschema.exceptions.XMLSchemaValidationError has .path, .reason, .position, etc.
             pos = getattr(err, 'position', None)
             if pos:
@@ -57,16 +421,14 @@ def validate_pain001_xml(xml_string: str, schema_path: str) -> Tuple[bool, Optio
                 errors.append(str(err))
     except Exception as e:
         # If parsing the XML itself fails, xmlschema.iter_errors can raise
-        return False, [f"Failed to parse/validate XML: {e}"]
+        return [f"Failed to parse/validate XML: {e}"], None
+    return errors, None
 
-    if errors:
-        return False, errors
-    return True, None
 
-
-def validate_pain001_file(xml_path: str, schema_path: str) -> Tuple[bool, Optional[List[str]]]:
+def validate_pain001_file(xml_path: str, schema_path: str, **options) -> Tuple[bool, Optional[List[str]]]:
     """
-    Read XML from file and validate. Returns same tuple as validate_pain001_xml.
+    Read XML from file and validate. Returns same tuple as validate_pain001_xml;
+    options (mode, max_errors, backend, fail_fast) are passed through to it.
     """
     try:
         with open(xml_path, 'rb') as f:
@@ -81,97 +443,376 @@ def validate_pain001_file(xml_path: str, schema_path: str) -> Tuple[bool, Option
         # fallback: let xmlschema handle bytes input
         xml_text = xml_bytes
 
-    return validate_pain001_xml(xml_text, schema_path)
+    return validate_pain001_xml(xml_text, schema_path, **options)
+
+
+# --- Parallel batch validation ---
+
+# Schema path / validation options of the current pool worker (set once per process by _pool_init).
+_POOL_SCHEMA_PATH: Optional[str] = None
+_POOL_OPTIONS: Dict[str, Any] = {}
+
+
+def _pool_init(schema_path: str, options: Optional[Dict[str, Any]] = None) -> None:
+    global _POOL_SCHEMA_PATH, _POOL_OPTIONS
+    _POOL_SCHEMA_PATH = schema_path
+    _POOL_OPTIONS = dict(options or {})
+    try:
+        # compile (or unpickle) the schema once per worker, before any file arrives
+        get_schema(schema_path, _resolve_backend(_POOL_OPTIONS.get("mode", MODE_FULL),
+                                                 _POOL_OPTIONS.get("backend", "auto")))
+    except Exception:
+        # reported per file by _pool_validate instead of killing the pool
+        pass
+
+
+def _pool_validate(xml_path: str) -> Tuple[str, bool, Optional[List[str]]]:
+    try:
+        valid, errors = validate_pain001_file(xml_path, _POOL_SCHEMA_PATH, **_POOL_OPTIONS)
+    except Exception as e:
+        valid, errors = False, [f"Validation failed: {e}"]
+    return xml_path, valid, errors
+
+
+def _default_chunksize(n_items: int, workers: int) -> int:
+    # ~4 chunks per worker balances load while keeping IPC round-trips low for
+    # many small files
+    return max(1, min(64, n_items // (workers * 4)))
+
+
+def validate_pain001_files(xml_paths: List[str], schema_path: str,
+                           workers: Optional[int] = None,
+                           chunksize: Optional[int] = None,
+                           **options) -> List[Tuple[str, bool, Optional[List[str]]]]:
+    """
+    Validate many pain.001 files against one XSD, fanning out to a process pool.
+    options (mode, max_errors, backend, fail_fast) apply to every file.
+
+    Each worker loads the compiled schema once at start-up (using a precompiled
+    artifact if present). Returns (xml_path, is_valid, errors) tuples in input
+    order; per-file read/parse problems are reported as errors, not raised.
+    workers defaults to os.cpu_count(); workers <= 1 validates in this process.
+    """
+    if not os.path.exists(schema_path):
+        raise SchemaNotFoundError(f"Schema file not found: {schema_path}")
+    xml_paths = list(xml_paths)
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(xml_paths)) if xml_paths else 1
+
+    if workers <= 1:
+        _pool_init(schema_path, options)
+        return [_pool_validate(p) for p in xml_paths]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    chunksize = chunksize or _default_chunksize(len(xml_paths), workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_pool_init, initargs=(schema_path, options)) as pool:
+        return list(pool.map(_pool_validate, xml_paths, chunksize=chunksize))
 
 
 # --- Basic MT103 structural validator (heuristic) ---
 
 _MT103_REQUIRED_TAGS = [":20:", ":32A:", ":50K:", ":59:", ":71A:"]
 
-def _find_tag(mt_text: str, tag: str) -> Optional[re.Match]:
-    """Return the regex match for tag content if present (simple heuristic)."""
-    # Tags begin with colon and end at the next line that starts with colon-tag or block end.
-    # This is a lightweight heuristic and not a full parser.
-    pattern = re.compile(re.escape(tag) + r"(.*?)(?=\n:|$)", re.DOTALL)
-    return pattern.search(mt_text)
+# A field starts at the beginning of a line with :NN: or :NNa: (e.g. :20:, :32A:).
+_MT_FIELD_RE = re.compile(r"^:([0-9]{2}[A-Za-z]?):", re.MULTILINE)
+# ...or right at the start of block 4, on the "{4:" line: '^' does not match at the
+# pos argument of finditer(), so that position is matched explicitly
+_MT_FIELD_AT_RE = re.compile(r":([0-9]{2}[A-Za-z]?):")
+_MT_32A_RE = re.compile(r"^(\d{6})([A-Z]{3})(\d+(?:\.\d{1,2})?)$")
 
-def validate_mt103_text(mt_text: str) -> Tuple[bool, List[str]]:
-    """
-    Perform basic structural checks on an MT103-like message text.
 
-    Returns:
-      (is_valid, list_of_issues) where issues is empty when valid.
+def _block4_bounds(mt_text: str) -> Tuple[int, int]:
+    """Return (start, end) offsets of the block 4 body, or the whole text if there is no {4: block."""
+    start = mt_text.find("{4:")
+    start = 0 if start == -1 else start + 3
+    end = mt_text.find("\n-}", start)
+    if end == -1:
+        end = mt_text.find("-}", start)
+    return start, (len(mt_text) if end == -1 else end)
 
-    Checks performed (heuristic):
-      - Required tags present: :20:, :32A:, :50K:, :59:, :71A:
-      - :32A: has format YYMMDD + 3-letter currency + amount (amount uses '.' as decimal separator)
+
+def tokenize_mt_block4(mt_text: str) -> List[Tuple[str, str]]:
+    """
+    Split the text block ({4:...-}) of an MT message into (tag, value) pairs.
+
+    One linear pass over the text: tags are returned as ':20:', ':32A:' etc.,
+    values keep their continuation lines (joined with '\n') without the trailing
+    line break. If the message has no {4: block the whole text is tokenized.
     """
+    start, end = _block4_bounds(mt_text)
+    fields: List[Tuple[str, str]] = []
+    tag = None
+    value_start = 0
+    first = _MT_FIELD_AT_RE.match(mt_text, start, end)
+    matches = _MT_FIELD_RE.finditer(mt_text, start, end)
+    if first is not None:
+        matches = itertools.chain([first], (m for m in matches if m.start() != start))
+    for m in matches:
+        if tag is not None:
+            fields.append((tag, mt_text[value_start:m.start()].rstrip("\r\n")))
+        tag = ":" + m.group(1) + ":"
+        value_start = m.end()
+    if tag is not None:
+        fields.append((tag, mt_text[value_start:end].rstrip("\r\n")))
+    return fields
+
+
+def validate_mt103_fields(fields: List[Tuple[str, str]]) -> Tuple[bool, List[str]]:
+    """Run the MT103 checks of validate_mt103_text on an already tokenized block 4."""
     issues = []
+    # first occurrence wins, like a top-down scan of the message
+    by_tag: Dict[str, str] = {}
+    for tag, value in fields:
+        by_tag.setdefault(tag, value)
 
     # Check presence of tags
     for tag in _MT103_REQUIRED_TAGS:
-        if not _find_tag(mt_text, tag):
+        if tag not in by_tag:
             issues.append(f"Missing required tag {tag}")
 
     # Validate :32A:
-    m = _find_tag(mt_text, ":32A:")
-    if m:
-        content = m.group(1).strip()
+    if ":32A:" in by_tag:
+        content = by_tag[":32A:"].strip()
         # Expecting pattern: YYMMDD<CCC><AMOUNT>  e.g. 230731USD1234.56 or 230731USD1234
-        m32 = re.match(r"^(\d{6})([A-Z]{3})(\d+(?:\.\d{1,2})?)$", content)
-        if not m32:
+        if not _MT_32A_RE.match(content):
             issues.append(f":32A: field has invalid format (expected YYMMDDCCCamount). Found: '{content}'")
-    else:
-        # already reported missing tag
-        pass
 
     # Simple check for :50K: and :59: not empty
     for tag in (":50K:", ":59:"):
-        mm = _find_tag(mt_text, tag)
-        if mm:
-            if not mm.group(1).strip():
-                issues.append(f"{tag} tag is present but empty")
+        if tag in by_tag and not by_tag[tag].strip():
+            issues.append(f"{tag} tag is present but empty")
 
     is_valid = len(issues) == 0
     return is_valid, issues
 
 
+def validate_mt103_text(mt_text: str) -> Tuple[bool, List[str]]:
+    """
+    Perform basic structural checks on an MT103-like message text.
+
+    Returns:
+      (is_valid, list_of_issues) where issues is empty when valid.
+
+    Checks performed (heuristic):
+      - Required tags present: :20:, :32A:, :50K:, :59:, :71A:
+      - :32A: has format YYMMDD + 3-letter currency + amount (amount uses '.' as decimal separator)
+
+    The message is tokenized once (tokenize_mt_block4) and all checks run on the result.
+    """
+    return validate_mt103_fields(tokenize_mt_block4(mt_text))
+
+
+# --- Multi-message MT files ---
+
+# Files at or above this size are memory-mapped instead of read into memory.
+MMAP_THRESHOLD = 8 * 1024 * 1024
+_MT_HEADER = b"{1:"
+_MT_SEPARATORS = b" \t\r\n$"
+_MT_TYPE_RE = re.compile(r"\{2:[IO](\d{3})")
+
+
+def _mt_segment(buf, start: int, end: int) -> Tuple[int, int, str]:
+    raw = buf[start:end].rstrip(_MT_SEPARATORS)
+    return start, len(raw), raw.decode("utf-8", errors="replace")
+
+
+def iter_mt_messages(path: str, mmap_threshold: int = MMAP_THRESHOLD) -> Iterator[Tuple[int, int, str]]:
+    """
+    Yield (offset, length, text) for each MT message in a file of concatenated messages.
+
+    A message starts at each '{1:' basic header block and runs up to the next one
+    (or end of file); surrounding whitespace and RJE '$' separators are trimmed.
+    offset/length are byte positions in the file. Large files are memory-mapped and
+    only one message at a time is decoded, so the file is never held as one string.
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+        if size >= mmap_threshold:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buf = f.read()
+        try:
+            pos = buf.find(_MT_HEADER)
+            if pos == -1:
+                pos = size
+            # anything before the first header is reported as its own (broken) message
+            if buf[0:pos].strip(_MT_SEPARATORS):
+                yield _mt_segment(buf, 0, pos)
+            while pos < size:
+                nxt = buf.find(_MT_HEADER, pos + len(_MT_HEADER))
+                end = size if nxt == -1 else nxt
+                yield _mt_segment(buf, pos, end)
+                pos = end
+        finally:
+            if isinstance(buf, mmap.mmap):
+                buf.close()
+
+
+def mt_message_type(mt_text: str) -> Optional[str]:
+    """Return e.g. 'MT103' from the application header block, or None if absent."""
+    m = _MT_TYPE_RE.search(mt_text, 0, 64)
+    return "MT" + m.group(1) if m else None
+
+
+def validate_mt_file(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Validate every message of an MT file, yielding one report dict per message:
+      {index, offset, length, type, reference, valid, issues}
+
+    MT103 messages get the full validate_mt103_fields checks; other types are only
+    tokenized and reported with valid=None.
+    """
+    for index, (offset, length, text) in enumerate(iter_mt_messages(path)):
+        fields = tokenize_mt_block4(text)
+        mt_type = mt_message_type(text)
+        reference = next((v.strip() for t, v in fields if t == ":20:"), None)
+        if mt_type in (None, "MT103"):
+            valid, issues = validate_mt103_fields(fields)
+        else:
+            valid, issues = None, [f"No validator for {mt_type}; skipped"]
+        yield {
+            "index": index,
+            "offset": offset,
+            "length": length,
+            "type": mt_type,
+            "reference": reference,
+            "valid": valid,
+            "issues": issues,
+        }
+
+
 # --- Simple convenience wrapper to validate pain.001 generated by swift_messages ---
 
-def validate_pain001_generated(xml_string: str, schema_path: str) -> Tuple[bool, Optional[List[str]]]:
+def validate_pain001_generated(xml_string: str, schema_path: str, tree: Any = None,
+                               **options) -> Tuple[bool, Optional[List[str]]]:
     """
     Convenience wrapper: ensures XML is well-formed and then validates against schema.
-    Returns same tuple as validate_pain001_xml.
+    Returns same tuple as validate_pain001_xml; options are passed through to it.
+
+    The XML is parsed at most once: pass tree (e.g. from
+    generate_pain001(..., return_tree=True)) to skip parsing entirely; otherwise the
+    text is parsed once for the well-formedness check and that tree is validated.
     """
-    # First check well-formedness
-    try:
-        ET.fromstring(xml_string)
-    except ET.ParseError as e:
-        return False, [f"XML not well-formed: {e}"]
+    if tree is None:
+        backend = _resolve_backend(options.get("mode", MODE_FULL), options.get("backend", "auto"))
+        # First check well-formedness, keeping the parsed tree
+        try:
+            if backend == "lxml":
+                tree = _lxml_document(xml_string)
+            else:
+                tree = ET.fromstring(xml_string)
+        except ET.ParseError as e:
+            return False, [f"XML not well-formed: {e}"]
+        except Exception as e:
+            if HAS_LXML and isinstance(e, lxml_etree.XMLSyntaxError):
+                return False, [f"XML not well-formed: {e}"]
+            raise
 
-    return validate_pain001_xml(xml_string, schema_path)
+    return validate_pain001_xml(tree, schema_path, **options)
 
 
-# --- Example usage (for quick manual testing) ---
-if __name__ == "__main__":
-    import sys
-    import textwrap
-
-    if len(sys.argv) < 3:
-        print(textwrap.dedent("""\
-            Usage:
-              python swift_iso_validator.py <xml_file_or_mt_file> <schema.xsd>  # for pain.001 validate
-            Examples:
-              python swift_iso_validator.py samples/sample_pain001.xml schemas/pain.001.001.03.xsd
-            """))
-        sys.exit(1)
-
-    xml_file = sys.argv[1]
-    schema = sys.argv[2]
-
-    # Try pain.001 file validation
+# --- Command line ---
+
+def _validate_mt_batch(mt_path: str, report_path: Optional[str]) -> int:
+    """Write one JSON line per message; return 0 if every checked message is valid."""
+    out = open(report_path, "w", encoding="utf-8") if report_path else sys.stdout
+    total = invalid = skipped = 0
+    try:
+        for rec in validate_mt_file(mt_path):
+            out.write(json.dumps(rec) + "\n")
+            total += 1
+            if rec["valid"] is None:
+                skipped += 1
+            elif not rec["valid"]:
+                invalid += 1
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"MT batch: {total} messages, {invalid} invalid, {skipped} skipped", file=sys.stderr)
+    return 1 if invalid else 0
+
+
+def _validate_pain001_dir(xml_dir: str, schema_path: str, workers: Optional[int], **options) -> int:
+    """Validate every *.xml in xml_dir in parallel; return 0 if all are valid."""
+    paths = sorted(
+        os.path.join(xml_dir, name) for name in os.listdir(xml_dir) if name.lower().endswith(".xml")
+    )
     try:
-        valid, errs = validate_pain001_file(xml_file, schema)
+        results = validate_pain001_files(paths, schema_path, workers=workers, **options)
+    except SchemaNotFoundError as e:
+        print("Schema error:", e)
+        return 1
+    invalid = 0
+    for path, valid, errs in results:
+        print(f"{path}: {'VALID' if valid else 'INVALID'}")
+        if not valid:
+            invalid += 1
+            for e in errs or []:
+                print(" -", e)
+    print(f"ISO20022 validation: {len(results)} files, {invalid} invalid")
+    return 1 if invalid else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Validate pain.001 XML against an XSD, or batches of MT messages.",
+        epilog=(
+            "Examples:\n"
+            "  python swift_iso_validator.py samples/sample_pain001.xml schemas/pain.001.001.03.xsd\n"
+            "  python swift_iso_validator.py outbox/ schemas/pain.001.001.03.xsd --workers 16\n"
+            "  python swift_iso_validator.py --precompile assets/schemas/pain.001.001.03.xsd\n"
+            "  python swift_iso_validator.py --mt-batch inbound/day_end.fin --report report.jsonl"
+        ),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("xml_file", nargs="?", help="pain.001 XML file (or a directory of *.xml files) to validate")
+    parser.add_argument("schema", nargs="?", help="pain.001 XSD")
+    parser.add_argument("--precompile", metavar="XSD", help="write <XSD>.pkl for fast warm starts and exit")
+    parser.add_argument("--mt-batch", metavar="MT_FILE", help="validate every MT message in a file (JSON Lines report)")
+    parser.add_argument("--report", metavar="JSONL", help="where to write the --mt-batch report (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="processes for validating a directory of XML files (default: CPU count)")
+    parser.add_argument("--mode", choices=VALIDATION_MODES, default=MODE_FULL,
+                        help="fast: valid/invalid only; first: stop after --max-errors; full: all diagnostics")
+    parser.add_argument("--max-errors", type=int, default=DEFAULT_ERROR_BUDGET,
+                        help="stop after this many errors per file; 0 = no limit (default: %(default)s)")
+    parser.add_argument("--fail-fast", action="store_true", help="stop each file at its first error")
+    parser.add_argument("--backend", choices=BACKENDS, default="auto",
+                        help="validation engine (auto: lxml for fast/first when installed)")
+    args = parser.parse_args(argv)
+
+    if args.precompile:
+        try:
+            print("Wrote schema artifact:", precompile_schema(args.precompile))
+        except SchemaNotFoundError as e:
+            print("Schema error:", e)
+            return 1
+        return 0
+
+    if args.mt_batch:
+        try:
+            return _validate_mt_batch(args.mt_batch, args.report)
+        except OSError as e:
+            print("MT file error:", e)
+            return 1
+
+    if not (args.xml_file and args.schema):
+        parser.print_help()
+        return 1
+
+    options = {"mode": args.mode, "max_errors": args.max_errors, "backend": args.backend,
+               "fail_fast": args.fail_fast}
+    if os.path.isdir(args.xml_file):
+        return _validate_pain001_dir(args.xml_file, args.schema, args.workers, **options)
+
+    # pain.001 file validation
+    try:
+        valid, errs = validate_pain001_file(args.xml_file, args.schema, **options)
         if valid:
             print("ISO20022 validation: VALID")
         else:
@@ -181,4 +822,9 @@ if __name__ == "__main__":
     except SchemaNotFoundError as e:
         print("Schema error:", e)
     except Exception as e:
-        print("Validation failed:", e)
\ No newline at end of file
+        print("Validation failed:", e)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
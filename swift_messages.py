@@ -8,10 +8,14 @@ It is NOT a certified SWIFT adapter; integrate a real gateway separately.
 from decimal import Decimal, ROUND_HALF_UP
 import datetime
 import xml.etree.ElementTree as ET
-from typing import Dict, Optional
+from typing import Dict, Optional, Iterable, Iterator, Any, Union, BinaryIO, Tuple
+import os
+import tempfile
 import uuid
 import html
 
+PAIN001_NS = 'urn:iso:std:iso:20022:tech:xsd:pain.001.001.03'
+
 def format_amount(amount: Decimal, currency: str) -> str:
     """Return amount in SWIFT numeric format (no thousands, decimal separator '.')"""
     return format(amount.quantize(Decimal('0.01'), rounding=ROUND_HALF_UP), 'f')
@@ -58,32 +62,9 @@ def generate_mt103(payment: Dict) -> str:
     lines.append("-}")  # end block
     return "\n".join(lines)
 
-def generate_pain001(payment: Dict) -> str:
-    """
-    Generate a minimal ISO 20022 pain.001 XML (credit transfer) for a single transaction.
-    This is a simplified example suitable for internal use / conversion only.
-    """
-    NS = {
-        '': 'urn:iso:std:iso:20022:tech:xsd:pain.001.001.03'
-    }
-    # Root
-    CstmrCdtTrfInitn = ET.Element('CstmrCdtTrfInitn', xmlns=NS[''])
-    # Group Header
-    GrpHdr = ET.SubElement(CstmrCdtTrfInitn, 'GrpHdr')
-    ET.SubElement(GrpHdr, 'MsgId').text = payment.get('reference', str(uuid.uuid4()))
-    ET.SubElement(GrpHdr, 'CreDtTm').text = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + 'Z'
-    ET.SubElement(GrpHdr, 'NbOfTxs').text = "1"
-    ET.SubElement(GrpHdr, 'CtrlSum').text = format_amount(Decimal(payment['amount']), payment.get('currency', 'USD'))
-
-    # Initiating Party (Ordering)
-    InitgPty = ET.SubElement(CstmrCdtTrfInitn, 'PmtInf')
-    ET.SubElement(InitgPty, 'PmtInfId').text = "PMT-" + datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
-    ET.SubElement(InitgPty, 'PmtMtd').text = "TRF"
-    ET.SubElement(InitgPty, 'NbOfTxs').text = "1"
-    ET.SubElement(InitgPty, 'CtrlSum').text = format_amount(Decimal(payment['amount']), payment.get('currency', 'USD'))
-
-    # PaymentInformation (single transaction)
-    CdtTrfTxInf = ET.SubElement(InitgPty, 'CdtTrfTxInf')
+def _build_cdt_trf_tx_inf(payment: Dict, parent: Optional[ET.Element] = None) -> ET.Element:
+    """Build one CdtTrfTxInf element (optionally attached to parent) for a payment dict."""
+    CdtTrfTxInf = ET.SubElement(parent, 'CdtTrfTxInf') if parent is not None else ET.Element('CdtTrfTxInf')
     PmtId = ET.SubElement(CdtTrfTxInf, 'PmtId')
     ET.SubElement(PmtId, 'EndToEndId').text = payment.get('reference', str(uuid.uuid4()))
 
@@ -116,13 +97,164 @@ def generate_pain001(payment: Dict) -> str:
         RmtInf = ET.SubElement(CdtTrfTxInf, 'RmtInf')
         ET.SubElement(RmtInf, 'Ustrd').text = payment.get('remittance_info')
 
-    # Pretty print XML
-    xml_str = ET.tostring(CstmrCdtTrfInitn, encoding='utf-8')
-    # Minimal pretty printing
-    import xml.dom.minidom
-    dom = xml.dom.minidom.parseString(xml_str)
-    pretty = dom.toprettyxml(indent="  ", encoding='utf-8').decode('utf-8')
-    return pretty
+    return CdtTrfTxInf
+
+def serialize_xml(root: ET.Element, compact: bool = False) -> str:
+    """
+    Serialize an ElementTree element to a string with an XML declaration.
+
+    Pretty output is indented in place with ET.indent and written in one pass
+    (no second parse through minidom). compact=True emits no insignificant
+    whitespace, for machine-to-machine use.
+    """
+    if compact:
+        return '<?xml version="1.0" encoding="utf-8"?>' + ET.tostring(root, encoding='unicode')
+    ET.indent(root, space="  ")
+    return '<?xml version="1.0" encoding="utf-8"?>\n' + ET.tostring(root, encoding='unicode') + "\n"
+
+def qualify_tree(root: ET.Element) -> ET.Element:
+    """
+    Turn a generator tree (plain tags + xmlns attribute, as serialized) into a
+    namespace-qualified tree in place, so it can be validated without re-parsing
+    the text. Returns root.
+    """
+    ns = root.attrib.pop('xmlns', None)
+    if ns:
+        prefix = '{' + ns + '}'
+        for el in root.iter():
+            el.tag = prefix + el.tag
+    return root
+
+def generate_pain001(payment: Dict, compact: bool = False,
+                     return_tree: bool = False) -> Union[str, Tuple[str, ET.Element]]:
+    """
+    Generate a minimal ISO 20022 pain.001 XML (credit transfer) for a single transaction.
+    This is a simplified example suitable for internal use / conversion only.
+    Pass compact=True for output without indentation.
+    With return_tree=True returns (xml_text, root) where root is the namespace-qualified
+    tree for validate_pain001_generated(..., tree=root).
+    """
+    NS = {
+        '': PAIN001_NS
+    }
+    # Root
+    CstmrCdtTrfInitn = ET.Element('CstmrCdtTrfInitn', xmlns=NS[''])
+    # Group Header
+    GrpHdr = ET.SubElement(CstmrCdtTrfInitn, 'GrpHdr')
+    ET.SubElement(GrpHdr, 'MsgId').text = payment.get('reference', str(uuid.uuid4()))
+    ET.SubElement(GrpHdr, 'CreDtTm').text = datetime.datetime.utcnow().replace(microsecond=0).isoformat() + 'Z'
+    ET.SubElement(GrpHdr, 'NbOfTxs').text = "1"
+    ET.SubElement(GrpHdr, 'CtrlSum').text = format_amount(Decimal(payment['amount']), payment.get('currency', 'USD'))
+
+    # Initiating Party (Ordering)
+    InitgPty = ET.SubElement(CstmrCdtTrfInitn, 'PmtInf')
+    ET.SubElement(InitgPty, 'PmtInfId').text = "PMT-" + datetime.datetime.utcnow().strftime("%Y%m%d%H%M%S")
+    ET.SubElement(InitgPty, 'PmtMtd').text = "TRF"
+    ET.SubElement(InitgPty, 'NbOfTxs').text = "1"
+    ET.SubElement(InitgPty, 'CtrlSum').text = format_amount(Decimal(payment['amount']), payment.get('currency', 'USD'))
+
+    # PaymentInformation (single transaction)
+    _build_cdt_trf_tx_inf(payment, InitgPty)
+
+    xml_text = serialize_xml(CstmrCdtTrfInitn, compact=compact)
+    if return_tree:
+        return xml_text, qualify_tree(CstmrCdtTrfInitn)
+    return xml_text
+
+# --- Streaming bulk pain.001 ---
+
+_CHUNK_SIZE = 64 * 1024
+
+
+def iter_pain001_batch(payments: Iterable[Dict],
+                       msg_id: Optional[str] = None,
+                       pmt_inf_id: Optional[str] = None,
+                       summary: Optional[Dict[str, Any]] = None,
+                       spool_dir: Optional[str] = None) -> Iterator[bytes]:
+    """
+    Generate one pain.001 document for any number of payments as UTF-8 byte chunks.
+
+    payments is consumed once, lazily. Each CdtTrfTxInf is serialized as soon as it
+    is read and spooled to an anonymous temp file while NbOfTxs/CtrlSum are summed
+    in the same pass; the header (which needs the totals) is then emitted followed
+    by the spooled transactions. Memory use is independent of the number of payments
+    and the consumer does not need a seekable stream.
+
+    If summary is given it is filled with msg_id, nb_of_txs and ctrl_sum.
+    """
+    msg_id = msg_id or str(uuid.uuid4())
+    now = datetime.datetime.utcnow()
+    pmt_inf_id = pmt_inf_id or "PMT-" + now.strftime("%Y%m%d%H%M%S")
+    count = 0
+    total = Decimal('0')
+
+    with tempfile.TemporaryFile(dir=spool_dir) as spool:
+        for payment in payments:
+            tx = _build_cdt_trf_tx_inf(payment)
+            ET.indent(tx, space="  ", level=2)
+            spool.write(b"    " + ET.tostring(tx, encoding='utf-8') + b"\n")
+            count += 1
+            # sum the amounts as written (rounded to cents) so CtrlSum matches the file
+            total += Decimal(format_amount(Decimal(payment['amount']), ''))
+
+        ctrl_sum = format_amount(total, '')
+        yield (
+            '<?xml version="1.0" encoding="utf-8"?>\n'
+            f'<CstmrCdtTrfInitn xmlns="{PAIN001_NS}">\n'
+            '  <GrpHdr>\n'
+            f'    <MsgId>{html.escape(msg_id)}</MsgId>\n'
+            f'    <CreDtTm>{now.replace(microsecond=0).isoformat()}Z</CreDtTm>\n'
+            f'    <NbOfTxs>{count}</NbOfTxs>\n'
+            f'    <CtrlSum>{ctrl_sum}</CtrlSum>\n'
+            '  </GrpHdr>\n'
+            '  <PmtInf>\n'
+            f'    <PmtInfId>{html.escape(pmt_inf_id)}</PmtInfId>\n'
+            '    <PmtMtd>TRF</PmtMtd>\n'
+            f'    <NbOfTxs>{count}</NbOfTxs>\n'
+            f'    <CtrlSum>{ctrl_sum}</CtrlSum>\n'
+        ).encode('utf-8')
+
+        spool.seek(0)
+        for chunk in iter(lambda: spool.read(_CHUNK_SIZE), b''):
+            yield chunk
+
+    yield b"  </PmtInf>\n</CstmrCdtTrfInitn>\n"
+
+    if summary is not None:
+        summary.update({'msg_id': msg_id, 'nb_of_txs': count, 'ctrl_sum': ctrl_sum})
+
+
+def write_pain001_batch(payments: Iterable[Dict],
+                        dest: Union[str, BinaryIO, Any],
+                        **kwargs) -> Dict[str, Any]:
+    """
+    Stream a bulk pain.001 for payments into dest and return its summary
+    ({'msg_id', 'nb_of_txs', 'ctrl_sum'}).
+
+    dest may be a file path (written atomically via temp file + rename), a binary
+    file-like object with write(), or a socket (anything with sendall()).
+    Extra keyword arguments are passed to iter_pain001_batch.
+    """
+    summary: Dict[str, Any] = {}
+    chunks = iter_pain001_batch(payments, summary=summary, **kwargs)
+    if isinstance(dest, (str, os.PathLike)):
+        dest = os.fspath(dest)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(dest)), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            os.replace(tmp, dest)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+    else:
+        send = getattr(dest, "sendall", None) or dest.write
+        for chunk in chunks:
+            send(chunk)
+    return summary
+
 
 def payment_from_transaction(account_number: str,
                              account_name: str,
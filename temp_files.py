@@ -0,0 +1,56 @@
+"""
+temp_files.py
+
+Temporary files handed to download buttons.
+
+st.download_button(data=...) accepts bytes, BytesIO and io.BufferedReader (among
+others), but not the io.BufferedRandom that tempfile.TemporaryFile() returns. The
+helpers here write a document to a named temp file and give it back as a
+read-only BufferedReader that removes the file when it is closed.
+
+Usage:
+  with write_temp_file(lambda f: render_pdf(text, f), suffix=".pdf") as pdf_file:
+      st.download_button("Download PDF", data=pdf_file, ...)
+
+Functions:
+  - write_temp_file(write, suffix="", dir=None) -> TempFileReader
+  - TempFileReader(path)   (io.BufferedReader; deletes path on close)
+
+Notes:
+ - The file is deleted on close() rather than right after opening, so this also
+   works on Windows, where an open file cannot be removed.
+"""
+import io
+import os
+import tempfile
+from typing import BinaryIO, Callable, Optional
+
+
+class TempFileReader(io.BufferedReader):
+    """Read-only handle on a temp file, positioned at 0; close() deletes the file."""
+
+    def __init__(self, path: str):
+        super().__init__(io.FileIO(path, "rb"))
+        self.path = path
+
+    def close(self) -> None:
+        try:
+            super().close()
+        finally:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+
+
+def write_temp_file(write: Callable[[BinaryIO], None], suffix: str = "",
+                    dir: Optional[str] = None) -> TempFileReader:
+    """Call write(f) on a new temp file, then return it reopened for reading."""
+    fd, path = tempfile.mkstemp(suffix=suffix, dir=dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+        return TempFileReader(path)
+    except BaseException:
+        os.unlink(path)
+        raise
@@ -0,0 +1,12 @@
+from benchmarks import app_startup_imports, eager_optional_imports
+
+
+def test_startup_imports_cover_both_apps():
+    statements = app_startup_imports()
+    assert "import bank_store" in statements              # swift_alliance_streamlit.py
+    assert "import smtplib" in statements                 # swift_alliance_gui.py
+    assert not any("streamlit" in s or "PyQt5" in s for s in statements)
+
+
+def test_optional_libraries_are_not_imported_at_startup():
+    assert eager_optional_imports() == []
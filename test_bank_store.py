@@ -0,0 +1,108 @@
+import json
+
+import pytest
+
+from bank_store import BankStore
+
+ACCOUNT = {"account_number": "CH93", "customer_id": "C1", "currency": "CHF", "balance": "100.00"}
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "bank.db")
+
+
+def _store(db_path, **kwargs):
+    kwargs.setdefault("compact_every", 0)
+    return BankStore(db_path, None, **kwargs)
+
+
+def test_upserts_and_load(db_path):
+    store = _store(db_path)
+    store.upsert_customer({"customer_id": "C1", "first_name": "A"})
+    store.upsert_account(ACCOUNT)
+    data = store.load()
+    assert [c["customer_id"] for c in data["customers"]] == ["C1"]
+    assert store.accounts_for_customer("C1") == [ACCOUNT]
+
+
+def test_load_returns_independent_containers(db_path):
+    store = _store(db_path)
+    store.load()["customers"].append({"customer_id": "X"})
+    assert store.load()["customers"] == []
+
+
+def test_earlier_load_results_keep_their_balance(db_path):
+    store = _store(db_path)
+    store.upsert_account(ACCOUNT)
+    before = store.load()
+    store.append_balance("CH93", "42.00")
+    assert before["accounts"][0]["balance"] == "100.00"
+    assert store.load()["accounts"][0]["balance"] == "42.00"
+
+
+def test_journal_is_replayed_by_other_instances(db_path):
+    writer = _store(db_path)
+    writer.upsert_account(ACCOUNT)
+    for i in range(50):
+        writer.append_transaction(f"T{i}", {"account_number": "CH93", "amount": str(i)})
+    writer.append_balance("CH93", "42.00")
+
+    reader = _store(db_path)
+    data = reader.load()
+    assert len(data["transactions"]) == 50
+    assert data["accounts"][0]["balance"] == "42.00"
+
+
+def test_compaction_folds_the_journal_into_sqlite(db_path):
+    store = _store(db_path)
+    store.upsert_account(ACCOUNT)
+    for i in range(10):
+        store.append_transaction(f"T{i}", {"account_number": "CH93"})
+    store.append_balance("CH93", "7.00")
+    assert store.compact() == 11
+    assert store.journal.size() < 200  # just the new generation's header
+    assert len(store.transactions_for_account("CH93")) == 10
+    assert store.accounts_for_customer("C1")[0]["balance"] == "7.00"
+
+    store.append_transaction("T10", {"account_number": "CH93"})
+    assert len(_store(db_path).load()["transactions"]) == 11
+
+
+def test_direct_writes_fold_the_pending_tail_first(db_path):
+    store = _store(db_path)
+    store.append_transaction("T1", {"account_number": "CH93"})
+    store.put_transaction("T2", {"account_number": "CH93"})
+    assert set(store.transactions_for_account("CH93")) == {"T1", "T2"}
+
+
+def test_background_compaction(db_path):
+    store = _store(db_path, compact_every=20)
+    for i in range(45):
+        store.append_transaction(f"T{i}", {"account_number": "CH93"})
+    if store._compactor is not None:
+        store._compactor.join()
+    assert len(_store(db_path).load()["transactions"]) == 45
+
+
+def test_migrates_legacy_json(tmp_path, db_path):
+    legacy = tmp_path / "bank_data.json"
+    legacy.write_text(json.dumps({"customers": [{"customer_id": "C1"}], "accounts": [ACCOUNT],
+                                  "transactions": {"T1": {"account_number": "CH93"}}}))
+    store = BankStore(db_path, str(legacy), compact_every=0)
+    assert not legacy.exists()
+    assert len(store.load()["transactions"]) == 1
+
+
+def test_append_after_a_torn_line(db_path):
+    store = _store(db_path)
+    store.append_transaction("T1", {"account_number": "CH93"})
+    with open(store.journal.path, "ab") as f:
+        f.write(b'{"op":"txn","id":"T2","da')  # crash in the middle of an append
+    assert set(_store(db_path).load()["transactions"]) == {"T1"}
+
+    store.append_transaction("T3", {"account_number": "CH93"})
+    assert set(_store(db_path).load()["transactions"]) == {"T1", "T3"}
+    store.upsert_customer({"customer_id": "C1"})
+    assert store.compact() == 0  # already folded by the upsert
+    assert set(_store(db_path).load()["transactions"]) == {"T1", "T3"}
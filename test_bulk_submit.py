@@ -0,0 +1,68 @@
+import pytest
+
+from bulk_submit import Ledger, iter_payloads, submit_bulk
+from gateway_client import GatewayClient
+from gateway_stub import StubGateway
+
+
+@pytest.fixture
+def stub():
+    with StubGateway() as stub:
+        yield stub
+
+
+def _payloads(n):
+    return [(i + 1, {"reference": f"R{i}", "amount": "1.00"}) for i in range(n)]
+
+
+def test_csv_sender_columns_are_folded(tmp_path):
+    src = tmp_path / "in.csv"
+    src.write_text("reference,amount,sender_bic\nR1,5.00,UBSWCHZH80A\n", encoding="utf-8")
+    assert list(iter_payloads(str(src))) == [(2, {"reference": "R1", "amount": "5.00",
+                                                  "sender": {"bic": "UBSWCHZH80A"}})]
+
+
+@pytest.mark.parametrize("batch_size", [1, 10])
+def test_submit_and_ledger(stub, tmp_path, batch_size):
+    ledger = str(tmp_path / "ledger.jsonl")
+    client = GatewayClient(stub.url)
+    counts = submit_bulk(_payloads(95), client, ledger_path=ledger, concurrency=4, batch_size=batch_size)
+    assert counts == {"ok": 95, "error": 0, "skipped": 0}
+    assert len(stub.messages) == 95
+    assert Ledger.completed(ledger) == {f"R{i}" for i in range(95)}
+    client.close()
+
+
+def test_resume_skips_completed_and_retries_failed(stub, tmp_path):
+    ledger = str(tmp_path / "ledger.jsonl")
+    client = GatewayClient(stub.url)
+    stub.fail_next(5, 503)  # POSTs are not retried: the first 5 messages fail
+    first = submit_bulk(_payloads(20), client, ledger_path=ledger, concurrency=1)
+    assert first == {"ok": 15, "error": 5, "skipped": 0}
+    second = submit_bulk(_payloads(20), client, ledger_path=ledger, concurrency=1)
+    assert second == {"ok": 5, "error": 0, "skipped": 15}
+    assert len(stub.messages) == 20
+    client.close()
+
+
+def test_batch_falls_back_to_single_sends(tmp_path):
+    with StubGateway(batch_enabled=False) as stub:
+        client = GatewayClient(stub.url)
+        counts = submit_bulk(_payloads(12), client, concurrency=2, batch_size=5)
+        assert counts["ok"] == 12
+        assert len(stub.messages) == 12
+        client.close()
+
+
+def test_resume_after_a_torn_ledger_line(stub, tmp_path):
+    ledger = tmp_path / "ledger.jsonl"
+    client = GatewayClient(stub.url)
+    submit_bulk(_payloads(3), client, ledger_path=str(ledger), concurrency=1)
+    with open(ledger, "a", encoding="utf-8") as f:
+        f.write('{"key":"R3","sta')  # run killed mid-write
+    submit_bulk(_payloads(5), client, ledger_path=str(ledger), concurrency=1)
+    assert Ledger.completed(str(ledger)) == {f"R{i}" for i in range(5)}
+    assert submit_bulk(_payloads(5), client, ledger_path=str(ledger),
+                       concurrency=1) == {"ok": 0, "error": 0, "skipped": 5}
+    assert len(stub.messages) == 5
+    client.close()
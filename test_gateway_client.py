@@ -0,0 +1,86 @@
+import base64
+import io
+import json
+import os
+import random
+
+import pytest
+
+import gateway_client
+from gateway_client import GatewayClient
+from gateway_stub import StubGateway
+
+
+class _ChunkedRaw:
+    """Stands in for resp.raw, returning at most `step` bytes per read()."""
+
+    def __init__(self, data: bytes, step: int):
+        self._buf = io.BytesIO(data)
+        self._step = step
+
+    def read(self, n=-1):
+        return self._buf.read(min(n, self._step) if n and n > 0 else -1)
+
+
+@pytest.fixture
+def stub():
+    with StubGateway() as stub:
+        yield stub
+
+
+def test_json_document_base64_is_decoded_incrementally():
+    rng = random.Random(25)
+    for trial in range(200):
+        data = rng.randbytes(rng.randint(0, 200000))
+        b64 = base64.b64encode(data).decode()
+        if trial % 3 == 0:
+            b64 = "\n".join(b64[i:i + 76] for i in range(0, len(b64), 76))
+        doc = {"id": 'a"b\\', "n": 3, "pdf_b64": b64} if trial % 4 else {"meta": {"a": 1}, "pdf_b64": b64}
+        encoded = json.dumps(doc)
+        if trial % 5 == 0:
+            encoded = encoded.replace("/", "\\/")
+        out = io.BytesIO()
+        field = gateway_client._write_json_document(_ChunkedRaw(encoded.encode(), rng.choice((1, 7, 1000, 65536))), out)
+        assert field == "pdf_b64"
+        assert out.getvalue() == data
+
+
+def test_json_document_text_and_errors():
+    out = io.BytesIO()
+    assert gateway_client._write_json_document(_ChunkedRaw(json.dumps({"txt": 'h\u00e9 "q"'}).encode(), 5), out) == "txt"
+    assert out.getvalue().decode() == 'h\u00e9 "q"'
+    with pytest.raises(ValueError):
+        gateway_client._write_json_document(_ChunkedRaw(b'{"pdf_b64": "QUJD', 3), io.BytesIO())
+    with pytest.raises(ValueError):
+        gateway_client._write_json_document(_ChunkedRaw(b'{"x": 1}', 3), io.BytesIO())
+
+
+@pytest.mark.parametrize("params", [{}, {"format": "pdf"}, {"format": "pdf", "encoding": "base64"}])
+def test_download_is_download_button_data(stub, download_button_accepts, params):
+    client = GatewayClient(stub.url)
+    mid = client.post_json("/messages/create", data={"body": "CHECK"})["message_id"]
+    f, _ = client.download(f"/messages/{mid}/download", params=params)
+    with f:
+        assert download_button_accepts(f)
+        f.seek(0)
+        assert b"CHECK" in f.read()
+    assert not os.path.exists(f.path)
+    client.close()
+
+
+def test_get_decodes_by_content_type(stub):
+    client = GatewayClient(stub.url)
+    mid = client.post_json("/messages/create", data={"body": "{\"not\": \"json\"}"})["message_id"]
+    assert client.get(f"/messages/{mid}/download") == b'{"not": "json"}'
+    assert client.get("/ping") == {"ok": True}
+    client.close()
+
+
+def test_get_retries_5xx_but_post_does_not(stub):
+    client = GatewayClient(stub.url, backoff_factor=0)
+    stub.fail_next(1, 503)
+    assert client.get("/ping") == {"ok": True}
+    stub.fail_next(1, 503)
+    with pytest.raises(Exception):
+        client.post_json("/messages/create", data={})
+    client.close()
@@ -0,0 +1,50 @@
+import os
+import random
+
+import pytest
+
+pytest.importorskip("reportlab")
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+from pdf_export import render_pdf_file, wrap_line
+
+
+def _random_lines(number, seed=18):
+    rng = random.Random(seed)
+    alphabet = "abcdefghijklmnopqrstuvwxyz" * 3 + "WMi.,-" + "    "
+    for _ in range(number):
+        line = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 200)))
+        yield line, rng.choice((20, 50, 100, 250))
+
+
+def test_wrap_line_pieces_fit_and_nothing_is_lost():
+    for line, max_width in _random_lines(3000):
+        pieces = wrap_line(line, "Helvetica", 10, max_width)
+        if line.strip():
+            assert all(pieces), (line, pieces)
+        for piece in pieces:
+            if len(piece) > 1:  # a single glyph wider than the column cannot be split
+                assert stringWidth(piece, "Helvetica", 10) <= max_width + 1e-6, (line, piece)
+        assert "".join(pieces).replace(" ", "") == line.replace(" ", "")
+
+
+def test_wrap_line_break_space_is_dropped():
+    line = "urrcp cdkmWzq pulznird bnsmou fzlbstkxovWzWioyvrjjh pcgqsqqyoopdseMyuutnavWthW"
+    pieces = wrap_line(line, "Helvetica", 10, 100)
+    assert all(pieces)
+    assert not any(p.startswith(" ") for p in pieces[1:])
+    assert all(stringWidth(p, "Helvetica", 10) <= 100 for p in pieces)
+
+
+def test_wrap_line_short_and_empty_lines():
+    assert wrap_line("", "Helvetica", 10, 100) == [""]
+    assert wrap_line("hello world", "Helvetica", 10, 500) == ["hello world"]
+
+
+def test_render_pdf_file_is_download_button_data(download_button_accepts):
+    with render_pdf_file("LINE\n" * 100) as f:
+        path = f.path
+        assert f.read(5) == b"%PDF-"
+        assert download_button_accepts(f)
+    assert not os.path.exists(path)
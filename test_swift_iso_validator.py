@@ -0,0 +1,67 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("xmlschema")
+
+from swift_iso_validator import HAS_LXML, tokenize_mt_block4, validate_mt103_text, validate_pain001_xml
+
+BODY = ":20:REF\n:32A:230731USD1234.56\n:50K:/1\nA\n:59:/2\nB\n:71A:SHA\n-}"
+TAGS = [":20:", ":32A:", ":50K:", ":59:", ":71A:"]
+
+
+@pytest.mark.parametrize("text", [
+    "{1:F01X}{4:" + BODY,      # field on the {4: line
+    "{1:F01X}{4:\n" + BODY,    # field on the next line
+    BODY,                      # no block 4 header
+])
+def test_tokenize_mt_block4(text):
+    assert [tag for tag, _ in tokenize_mt_block4(text)] == TAGS
+    assert validate_mt103_text(text) == (True, [])
+
+
+def test_tokenize_keeps_continuation_lines():
+    fields = dict(tokenize_mt_block4("{4:\n" + BODY))
+    assert fields[":50K:"] == "/1\nA"
+    assert fields[":71A:"] == "SHA"
+
+
+def test_validate_mt103_reports_problems():
+    valid, issues = validate_mt103_text("{4:\n:20:REF\n:32A:bad\n-}")
+    assert not valid
+    assert "Missing required tag :50K:" in issues
+    assert any(":32A:" in i for i in issues)
+
+
+XSD = ('<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">'
+       '<xs:element name="Amt" type="xs:decimal"/></xs:schema>')
+
+
+@pytest.fixture
+def xsd_path(tmp_path):
+    path = tmp_path / "amt.xsd"
+    path.write_text(XSD)
+    return str(path)
+
+
+@pytest.mark.skipif(not HAS_LXML, reason="lxml not installed")
+def test_lxml_backend_does_not_resolve_external_entities(xsd_path, tmp_path):
+    secret = tmp_path / "secret.txt"
+    secret.write_text("12.50")
+    xml = f'<!DOCTYPE Amt [<!ENTITY e SYSTEM "{secret.as_uri()}">]><Amt>&e;</Amt>'
+    valid, errors = validate_pain001_xml(xml, xsd_path, mode="fast", backend="lxml")
+    assert not valid  # with the entity expanded the document would be valid
+    assert "12.50" not in " ".join(errors)
+
+
+@pytest.mark.skipif(not HAS_LXML, reason="lxml not installed")
+def test_lxml_errors_stay_with_their_document(xsd_path):
+    def check(i):
+        xml = f"<Amt>{i}</Amt>" if i % 2 else f"<Amt>bad{i}</Amt>"
+        return i, validate_pain001_xml(xml, xsd_path, mode="first", backend="lxml")
+
+    with ThreadPoolExecutor(8) as pool:
+        for i, (valid, errors) in pool.map(check, range(4000)):
+            assert valid == bool(i % 2)
+            if not valid:
+                assert len(errors) == 1 and f"'bad{i}'" in errors[0]
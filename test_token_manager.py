@@ -0,0 +1,118 @@
+import base64
+import json
+import threading
+import time
+
+import pytest
+
+from token_manager import TokenManager, decode_jwt_expiry
+
+
+@pytest.fixture
+def tokens():
+    manager = TokenManager(refresh_margin=1, idle_timeout=60)
+    yield manager
+    manager.close()
+
+
+def _counter(expires_in=None):
+    calls = []
+
+    def fetch(*_):
+        calls.append(1)
+        response = {"access_token": f"t{len(calls)}"}
+        if expires_in is not None:
+            response["expires_in"] = expires_in
+        return response
+
+    return fetch, calls
+
+
+def test_decode_jwt_expiry():
+    claims = base64.urlsafe_b64encode(json.dumps({"exp": 1700000000}).encode()).decode().rstrip("=")
+    assert decode_jwt_expiry(f"h.{claims}.s") == 1700000000
+    assert decode_jwt_expiry("opaque") is None
+
+
+def test_concurrent_logins_share_one_request(tokens):
+    gate = threading.Event()
+    calls = []
+
+    def fetch():
+        gate.wait(1)
+        calls.append(1)
+        return {"access_token": "t", "expires_in": 3600}
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(tokens.login("k", fetch))) for _ in range(10)]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join()
+    assert results == ["t"] * 10
+    assert len(calls) == 1
+    assert tokens.get("k") == "t"
+
+
+def test_refreshes_before_expiry(tokens):
+    fetch, calls = _counter(expires_in=2)
+    assert tokens.login("k", fetch) == "t1"
+    time.sleep(1.5)
+    assert tokens.get("k") == "t2"
+    assert len(calls) == 2
+
+
+def test_failed_refresh_keeps_the_valid_token(tokens):
+    state = {"fail": False}
+
+    def fetch(*_):
+        if state["fail"]:
+            raise RuntimeError("auth down")
+        return {"access_token": "t", "expires_in": 4}
+
+    tokens.login("k", fetch)
+    state["fail"] = True
+    time.sleep(2.5)  # refresh (due at 2s) has failed by now
+    assert tokens.get("k") == "t"
+
+
+def test_idle_keys_are_evicted():
+    tokens = TokenManager(refresh_margin=1, idle_timeout=1.5)
+    try:
+        fetch, _ = _counter(expires_in=2)
+        tokens.login("k", fetch)
+        tokens.login("opaque", lambda: {"access_token": "x"})
+        time.sleep(3.5)
+        assert tokens.get("k") is None
+        assert tokens.get("opaque") is None
+    finally:
+        tokens.close()
+
+
+def test_invalidate(tokens):
+    fetch, _ = _counter(expires_in=3600)
+    tokens.login("k", fetch)
+    tokens.invalidate("k")
+    assert tokens.get("k") is None
+
+
+def test_invalidate_during_login_does_not_cache(tokens):
+    started, gate = threading.Event(), threading.Event()
+
+    def fetch():
+        started.set()
+        gate.wait(1)
+        return {"access_token": "stale", "expires_in": 3600}
+
+    results = []
+    t = threading.Thread(target=lambda: results.append(tokens.login("k", fetch)))
+    t.start()
+    started.wait(1)
+    tokens.invalidate("k")
+    gate.set()
+    t.join()
+    assert results == ["stale"]
+    assert tokens.get("k") is None
+    fresh, _ = _counter(expires_in=3600)
+    assert tokens.login("k", fresh) == "t1"
@@ -0,0 +1,53 @@
+import json
+
+import pytest
+
+from user_store import UserDirectory
+
+
+@pytest.fixture
+def users(tmp_path):
+    return UserDirectory(str(tmp_path / "users.json"))
+
+
+def test_add_and_verify(users):
+    assert users.add("alice", "pw") == "added"
+    assert users.add("alice", "other") == "skipped"
+    assert users.verify("alice", "pw")
+    assert not users.verify("alice", "other")
+    assert users.add("alice", "other", overwrite=True) == "overwritten"
+    assert users.verify("alice", "other")
+
+
+def test_add_many_counts(users):
+    users.add("a", "1")
+    counts = users.add_many([("a", "2"), ("b", "1"), ("b", "2")])
+    assert counts == {"added": 1, "skipped": 2, "overwritten": 0}
+    assert users.verify("b", "1")
+
+
+def test_add_many_overwrite_counts_only_existing_users(users):
+    users.add("a", "1")
+    counts = users.add_many([("c", "1"), ("c", "2"), ("a", "x"), ("a", "y")], overwrite=True)
+    assert counts == {"added": 1, "skipped": 0, "overwritten": 1}
+    assert users.verify("c", "2") and users.verify("a", "y")
+    with open(users.path, encoding="utf-8") as f:
+        assert sorted(u["username"] for u in json.load(f)["users"]) == ["a", "c"]
+
+
+def test_add_many_failure_leaves_file_unchanged(users):
+    users.add("a", "1")
+
+    def pairs():
+        yield "b", "1"
+        raise ValueError("bad input")
+
+    with pytest.raises(ValueError):
+        users.add_many(pairs())
+    assert users.usernames() == ["a"]
+
+
+def test_sees_changes_made_by_another_instance(users):
+    users.add("a", "1")
+    UserDirectory(users.path).add("b", "1")
+    assert users.exists("b")
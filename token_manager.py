@@ -0,0 +1,244 @@
+"""
+token_manager.py
+
+Access-token cache with proactive background refresh for the gateway auth service.
+
+Tokens are cached per key (e.g. (username, client_id)). Expiry comes from the JWT
+"exp" claim, or from the login response's "expires_in" when the token is opaque.
+A single scheduler thread renews each token `refresh_margin` seconds before it
+expires, so in the steady state get() is a dict lookup and never waits for the
+auth service. Only the first login, or a token that has already expired (e.g.
+after the refresh kept failing), blocks the caller.
+
+Usage:
+  tokens = TokenManager()
+  token = tokens.login(("alice", client_id), lambda: post_login(user, pwd),
+                       refresh=lambda old: post_refresh(old) or post_login(user, pwd))
+  ...
+  headers = {"Authorization": f"Bearer {tokens.get(('alice', client_id))}"}
+
+Functions:
+  - decode_jwt_expiry(token) -> epoch seconds or None (no signature check)
+  - TokenManager.login(key, fetch, refresh=None) -> access token
+  - TokenManager.get(key) -> access token or None (not logged in)
+  - TokenManager.invalidate(key) -> None          (logout, or after a 401)
+
+Notes:
+ - fetch() / refresh(response) return the auth service's JSON response
+   ({"access_token" or "token", optional "expires_in", optional "refresh_token"}).
+   refresh receives the previous response, so it can use its refresh_token.
+ - Concurrent callers needing the same key's token share one in-flight request.
+ - A failed background refresh is retried with backoff while the old token is
+   still valid; the token is only dropped once it has expired.
+ - invalidate() also abandons a request in flight for the key: its result is
+   returned to the callers waiting on it but not cached.
+ - Keys not used by login()/get() for `idle_timeout` seconds are evicted instead
+   of refreshed: the token and the fetch/refresh callables (which may hold
+   credentials) are dropped, and the next login() fetches afresh.
+"""
+import base64
+import heapq
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger("token_manager")
+
+DEFAULT_REFRESH_MARGIN = 60.0
+DEFAULT_IDLE_TIMEOUT = 30 * 60.0
+MIN_RETRY_DELAY = 1.0
+
+AuthResponse = Dict[str, Any]
+
+
+def decode_jwt_expiry(token: str) -> Optional[float]:
+    """Return the "exp" claim of a JWT (epoch seconds), or None if token is not a JWT."""
+    parts = token.split(".")
+    if len(parts) != 3:
+        return None
+    try:
+        payload = parts[1] + "=" * (-len(parts[1]) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp is not None else None
+    except Exception:
+        return None
+
+
+class _Entry:
+    __slots__ = ("token", "expires_at", "response", "refresh", "generation", "last_used")
+
+    def __init__(self, token: str, expires_at: Optional[float], response: AuthResponse,
+                 refresh: Callable[[AuthResponse], AuthResponse], generation: int,
+                 last_used: float):
+        self.token = token
+        self.expires_at = expires_at
+        self.response = response
+        self.refresh = refresh
+        self.generation = generation
+        self.last_used = last_used  # last login()/get(); background refreshes don't count
+
+
+class TokenManager:
+    def __init__(self, refresh_margin: float = DEFAULT_REFRESH_MARGIN, workers: int = 2,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 clock: Callable[[], float] = time.time):
+        self.refresh_margin = refresh_margin
+        self.idle_timeout = idle_timeout
+        self._clock = clock
+        self._lock = threading.Condition()
+        self._entries: Dict[Hashable, _Entry] = {}
+        self._inflight: Dict[Hashable, Future] = {}
+        self._schedule: List[Tuple[float, int, Hashable]] = []  # (refresh_at, generation, key)
+        self._generation = 0
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="token-refresh")
+        self._closed = False
+        self._scheduler = threading.Thread(target=self._run_scheduler, name="token-scheduler", daemon=True)
+        self._scheduler.start()
+
+    # --- public API ------------------------------------------------------------
+    def login(self, key: Hashable, fetch: Callable[[], AuthResponse],
+              refresh: Optional[Callable[[AuthResponse], AuthResponse]] = None) -> str:
+        """
+        Return a valid token for key, calling fetch() only if none is cached (or it
+        has expired). refresh(previous_response) renews it later; default: fetch().
+        """
+        renew = refresh or (lambda _previous: fetch())
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.last_used = self._clock()
+                if self._is_valid(entry):
+                    entry.refresh = renew
+                    return entry.token
+        return self._request(key, lambda _previous: fetch(), renew).result()
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """The cached token for key; blocks only if it has expired and is being renewed."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            entry.last_used = self._clock()
+            if self._is_valid(entry):
+                return entry.token
+            future = self._inflight.get(key)
+            if future is None:
+                future = self._start(key, entry.refresh, entry.refresh, entry.response)
+        return future.result()
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+            # a request already in flight must not put the token back when it lands
+            self._inflight.pop(key, None)
+
+    def close(self) -> None:
+        with self._lock:
+            self._closed = True
+            self._lock.notify_all()
+        self._executor.shutdown(wait=False)
+
+    # --- internals ---------------------------------------------------------------
+    def _is_valid(self, entry: _Entry) -> bool:
+        return entry.expires_at is None or self._clock() < entry.expires_at
+
+    def _request(self, key: Hashable, call: Callable[[AuthResponse], AuthResponse],
+                 renew: Callable[[AuthResponse], AuthResponse]) -> Future:
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is None:
+                previous = self._entries[key].response if key in self._entries else {}
+                future = self._start(key, call, renew, previous)
+            return future
+
+    def _start(self, key, call, renew, previous) -> Future:
+        """Submit call(previous) for key; caller holds the lock. Joiners share the future."""
+        future: Future = Future()
+        self._inflight[key] = future
+        self._executor.submit(self._fetch, key, call, renew, previous, future)
+        return future
+
+    def _fetch(self, key, call, renew, previous, future: Future) -> None:
+        try:
+            response = call(previous)
+            token = response.get("access_token") or response.get("token")
+            if not token:
+                raise ValueError("auth response contains no access token")
+        except BaseException as e:
+            with self._lock:
+                current = self._current(key, future)
+                entry = self._entries.get(key)
+                if current and entry is not None and self._is_valid(entry):
+                    # keep serving the current token; try again later
+                    delay = MIN_RETRY_DELAY
+                    if entry.expires_at is not None:
+                        remaining = entry.expires_at - self._clock()
+                        delay = min(max(remaining / 4, MIN_RETRY_DELAY), remaining / 2)
+                    self._push(self._clock() + delay, entry.generation, key)
+                    logger.warning("Token refresh for %r failed (%s); retrying in %.0fs", key, e, delay)
+                    future.set_result(entry.token)
+                    return
+            future.set_exception(e)
+            return
+        expires_at = decode_jwt_expiry(token)
+        if expires_at is None and response.get("expires_in") is not None:
+            expires_at = self._clock() + float(response["expires_in"])
+        with self._lock:
+            if not self._current(key, future):
+                # invalidated while the request was in flight: hand the token to
+                # the callers that asked for it, but don't cache or refresh it
+                future.set_result(token)
+                return
+            self._generation += 1
+            previous_entry = self._entries.get(key)
+            last_used = previous_entry.last_used if previous_entry is not None else self._clock()
+            entry = _Entry(token, expires_at, response, renew, self._generation, last_used)
+            self._entries[key] = entry
+            if expires_at is not None:
+                lifetime = expires_at - self._clock()
+                # refresh margin early, but never in the first half of a short-lived token
+                self._push(expires_at - min(self.refresh_margin, lifetime / 2), entry.generation, key)
+            else:
+                self._push(last_used + self.idle_timeout, entry.generation, key)  # idle check only
+        future.set_result(token)
+
+    def _current(self, key: Hashable, future: Future) -> bool:
+        """Whether future is still key's in-flight request (not invalidated); clears it if so."""
+        if self._inflight.get(key) is not future:
+            return False
+        del self._inflight[key]
+        return True
+
+    def _push(self, when: float, generation: int, key: Hashable) -> None:
+        heapq.heappush(self._schedule, (when, generation, key))
+        self._lock.notify()
+
+    def _run_scheduler(self) -> None:
+        with self._lock:
+            while not self._closed:
+                if not self._schedule:
+                    self._lock.wait()
+                    continue
+                when, generation, key = self._schedule[0]
+                delay = when - self._clock()
+                if delay > 0:
+                    self._lock.wait(min(delay, 60.0))
+                    continue
+                heapq.heappop(self._schedule)
+                entry = self._entries.get(key)
+                # skip entries that were replaced or logged out since scheduling
+                if entry is None or entry.generation != generation or key in self._inflight:
+                    continue
+                idle_until = entry.last_used + self.idle_timeout
+                if self._clock() >= idle_until:
+                    # nobody has asked for this token lately: drop it and its credentials
+                    del self._entries[key]
+                    logger.info("Evicted idle token for %r", key)
+                    continue
+                if entry.expires_at is None:
+                    self._push(idle_until, generation, key)  # nothing to refresh; check again
+                    continue
+                self._start(key, entry.refresh, entry.refresh, entry.response)
@@ -0,0 +1,193 @@
+"""
+user_store.py
+
+Shared access to users.json for add_user.py and the Streamlit app.
+
+The file is parsed once into a username -> record index that stays in memory and is
+reloaded only when the file's mtime or size changes, so a login is a stat() plus a
+dict lookup. Writes go to a temp file in the same directory that is fsync'd and
+renamed over users.json, so readers never see a half-written file.
+
+Functions:
+  - hash_password(password) -> str                  (SHA256 + salt, as before)
+  - get_directory(path=None) -> UserDirectory       (one shared instance per path)
+  - UserDirectory.verify(username, password) -> bool
+  - UserDirectory.get(username) -> record or None
+  - UserDirectory.add(username, password, overwrite=False) -> "added" | "skipped" | "overwritten"
+  - UserDirectory.add_many(pairs, overwrite=False) -> {"added": n, "skipped": n, "overwritten": n}
+
+Notes:
+ - If users.json contains the same username twice, the first record wins (that is
+   the one the old linear scan in add_user.py found first).
+ - Do NOT commit users.json with real production credentials to public repos.
+"""
+import hashlib
+import hmac
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+ROOT_DIR = os.path.dirname(__file__)
+USERS_FILE = os.path.join(ROOT_DIR, "users.json")
+SALT = "swift_alliance_app_salt_2025"
+
+
+def hash_password(password: str) -> str:
+    return hashlib.sha256((password + SALT).encode()).hexdigest()
+
+
+def _atomic_write_json(path: str, data: Any) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(prefix=".users-", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class UserDirectory:
+    """Cached, thread-safe view of one users.json file."""
+
+    def __init__(self, path: str = USERS_FILE):
+        self.path = path
+        self._lock = threading.RLock()
+        self._data: Dict[str, Any] = {"users": []}
+        self._index: Dict[str, Dict[str, Any]] = {}
+        self._stamp: Optional[Tuple[int, int]] = None
+
+    def _stat(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def _refresh(self) -> None:
+        """Re-read the file if its mtime or size changed since the last read."""
+        stamp = self._stat()
+        if stamp == self._stamp:
+            return
+        data: Dict[str, Any] = {"users": []}
+        if stamp is not None:
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except Exception:
+                data = {"users": []}
+        index: Dict[str, Dict[str, Any]] = {}
+        for u in data.get("users", []):
+            index.setdefault(u.get("username"), u)
+        self._data, self._index, self._stamp = data, index, stamp
+
+    def _write(self) -> None:
+        _atomic_write_json(self.path, self._data)
+        self._stamp = self._stat()
+
+    # --- reads -----------------------------------------------------------------
+    def get(self, username: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._refresh()
+            return self._index.get(username)
+
+    def exists(self, username: str) -> bool:
+        return self.get(username) is not None
+
+    def verify(self, username: str, password: str) -> bool:
+        record = self.get(username)
+        if record is None:
+            return False
+        return hmac.compare_digest(str(record.get("password", "")), hash_password(password))
+
+    def usernames(self) -> List[str]:
+        with self._lock:
+            self._refresh()
+            return list(self._index)
+
+    # --- writes ----------------------------------------------------------------
+    def add(self, username: str, password: str, overwrite: bool = False) -> str:
+        """Add a user; returns "added", "skipped" (exists, not overwritten) or "overwritten"."""
+        with self._lock:
+            self._refresh()
+            record = {"username": username, "password": hash_password(password)}
+            users = self._data.setdefault("users", [])
+            if username in self._index:
+                if not overwrite:
+                    return "skipped"
+                users[:] = [u for u in users if u.get("username") != username]
+                status = "overwritten"
+            else:
+                status = "added"
+            users.append(record)
+            self._index[username] = record
+            self._write()
+            return status
+
+    def add_many(self, users: Iterable[Tuple[str, str]], overwrite: bool = False) -> Dict[str, int]:
+        """
+        Add (username, password) pairs and write users.json once. Duplicates, both
+        against the existing users and within the input, are skipped unless
+        overwrite is set (then the last one wins). Returns counts for "added"
+        (new users), "overwritten" (users that existed before the import) and
+        "skipped" (input records ignored).
+        """
+        counts = {"added": 0, "skipped": 0, "overwritten": 0}
+        with self._lock:
+            self._refresh()
+            users_list = self._data.setdefault("users", [])
+            existing = set(self._index)
+            replaced = set()
+            try:
+                for username, password in users:
+                    if username in self._index:
+                        if not overwrite:
+                            counts["skipped"] += 1
+                            continue
+                        # a repeat within the input replaces the earlier record, uncounted
+                        if username in existing and username not in replaced:
+                            replaced.add(username)
+                            counts["overwritten"] += 1
+                    else:
+                        counts["added"] += 1
+                    self._index[username] = {"username": username, "password": hash_password(password)}
+                if counts["added"] or counts["overwritten"]:
+                    kept = [u for u in users_list if u.get("username") not in replaced]
+                    known = {u.get("username") for u in kept}
+                    kept.extend(r for name, r in self._index.items() if name not in known)
+                    self._data["users"] = kept
+                    self._write()
+            except BaseException:
+                self._stamp = None  # the index was partly updated; reload on next access
+                raise
+            return counts
+
+    def ensure_user(self, username: str, password: str) -> bool:
+        """Create the user only if users.json does not exist yet (first start)."""
+        with self._lock:
+            if os.path.exists(self.path):
+                return False
+            self.add(username, password)
+            return True
+
+
+_DIRECTORIES: Dict[str, UserDirectory] = {}
+_DIRECTORIES_LOCK = threading.Lock()
+
+
+def get_directory(path: Optional[str] = None) -> UserDirectory:
+    """Return the process-wide UserDirectory for path (default users.json next to this file)."""
+    path = os.path.abspath(path or USERS_FILE)
+    with _DIRECTORIES_LOCK:
+        directory = _DIRECTORIES.get(path)
+        if directory is None:
+            directory = _DIRECTORIES[path] = UserDirectory(path)
+        return directory